@@ -0,0 +1,96 @@
+"""Chart redraw latency: rebuilding figures per analysis vs updating them in place.
+
+Renders with the Agg backend, so no display is needed. Each strategy redraws the
+radar and timeline for the same sequence of random results:
+
+    recreate   plot_radar + plot_timeline, draw, plt.close (what the GUI used to do)
+    update     one EmotionCharts, data swapped in place, then redrawn
+    blit       as update, but the radar is blitted over its cached background
+
+Usage:
+    python -m benchmarks.chart_redraw
+    python -m benchmarks.chart_redraw --rounds 200 --sentences 40
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+
+from src.emotion_scorer import EMOTIONS  # noqa: E402
+from src.visualizer import EmotionCharts, plot_radar, plot_timeline  # noqa: E402
+
+
+def random_results(rounds, sentences, seed=0):
+    """Return `rounds` (emotions, per_sentence) pairs of random scores."""
+    rng = random.Random(seed)
+    results = []
+    for _ in range(rounds):
+        emotions = {e: round(rng.random(), 2) for e in EMOTIONS}
+        per_sentence = [{e: rng.random() * 2 for e in EMOTIONS} for _ in range(sentences)]
+        results.append((emotions, per_sentence))
+    return results
+
+
+def time_recreate(results):
+    timings = []
+    for emotions, per_sentence in results:
+        t0 = time.perf_counter()
+        for fig in (plot_radar(emotions), plot_timeline(per_sentence)):
+            if fig is not None:
+                fig.canvas.draw()
+        plt.close("all")
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def time_update(results, blit=False):
+    charts = EmotionCharts(blit=blit)
+    canvases = [FigureCanvasAgg(charts.radar_figure), FigureCanvasAgg(charts.timeline_figure)]
+    for canvas in canvases:
+        canvas.draw()  # the first draw happens when the window opens, not per analysis
+
+    timings = []
+    for emotions, per_sentence in results:
+        t0 = time.perf_counter()
+        # draw_idle on an Agg canvas draws immediately, so this includes rendering
+        charts.update(emotions, per_sentence)
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.chart_redraw",
+                                     description="Compare chart redraw strategies.")
+    parser.add_argument("--rounds", type=int, default=50, help="analyses to redraw")
+    parser.add_argument("--sentences", type=int, default=12, help="sentences per timeline")
+    args = parser.parse_args(argv)
+
+    results = random_results(args.rounds, args.sentences)
+    strategies = {
+        "recreate": time_recreate,
+        "update": time_update,
+        "blit": lambda r: time_update(r, blit=True),
+    }
+
+    print(f"{args.rounds} redraws, {args.sentences} sentences each")
+    print(f"{'strategy':<10}{'median (ms)':>13}{'mean (ms)':>11}{'max (ms)':>10}")
+    baseline = None
+    for name, run in strategies.items():
+        timings = [t * 1000 for t in run(results)]
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(f"{name:<10}{median:>13.1f}{statistics.mean(timings):>11.1f}{max(timings):>10.1f}"
+              f"   ({baseline / median:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
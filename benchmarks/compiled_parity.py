@@ -0,0 +1,94 @@
+"""Parity check: compiled_lexicon.score_batch against preprocess + score_text.
+
+Scores edge-case batches (empty documents, emoticon-only documents, batches
+where no document has a sentence) and a seeded random corpus both ways. Exits
+non-zero if score_batch raises or any document's emotions or dominant emotion
+differ.
+
+Usage:
+    python -m benchmarks.compiled_parity
+    python -m benchmarks.compiled_parity --docs 5000 --seed 3
+"""
+import argparse
+import random
+import sys
+
+from src.compiled_lexicon import compile_lexicon, score_batch
+from src.emotion_scorer import EMOTIONS, LEXICON_PATH, load_lexicon, score_text
+from src.preprocessor import EMOTICON_PATTERNS, preprocess
+
+BATCHES = [
+    [],
+    [""],
+    [":)"],
+    ["123 ..."],
+    [":)", "", ":( :(", "!!!"],
+    ["I am so happy today :)", ":D", ""],
+    ["not happy at all", "never again. glad it is over.", "<3"],
+]
+
+
+def random_batch(rng, vocabulary, n_docs):
+    """Random documents of lexicon words, modifiers, filler and emoticons; some have no words at all."""
+    filler = ["the", "day", "was", "and", "123", "...", "not", "never", "very", "extremely"]
+    docs = []
+    for _ in range(n_docs):
+        parts = []
+        for _ in range(rng.randint(0, 15)):
+            kind = rng.random()
+            if kind < 0.4:
+                parts.append(rng.choice(vocabulary))
+            elif kind < 0.8:
+                parts.append(rng.choice(filler))
+            else:
+                parts.append(rng.choice(EMOTICON_PATTERNS))
+        docs.append(" ".join(parts))
+    return docs
+
+
+def find_mismatches(batch, lexicon, compiled, mode="fast"):
+    """Return (text, expected, got) for each document score_batch scores differently."""
+    try:
+        result = score_batch(batch, compiled, mode=mode)
+    except Exception as e:  # a crash on valid input is a failure like any other
+        return [(batch, "no error", f"{type(e).__name__}: {e}")]
+    mismatches = []
+    for i, text in enumerate(batch):
+        stemmed, _, emoticons = preprocess(text, mode, phrases=compiled.phrases)
+        expected = score_text(stemmed, lexicon, emoticons, output="summary")
+        got = dict(zip(EMOTIONS, result["emotions"][i].tolist()))
+        dominant = EMOTIONS[result["dominant"][i]]
+        if got != expected["emotions"] or dominant != expected["dominant"]:
+            mismatches.append((text, expected, {"emotions": got, "dominant": dominant}))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compiled_parity",
+                                     description="Check that compiled batch scoring matches score_text.")
+    parser.add_argument("--lexicon", default=LEXICON_PATH, help="path to the emotion lexicon")
+    parser.add_argument("--docs", type=int, default=2000, help="random documents on top of the fixed batches")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random documents")
+    parser.add_argument("--show", type=int, default=5, help="mismatches to print")
+    args = parser.parse_args(argv)
+
+    lexicon = load_lexicon(args.lexicon)
+    compiled = compile_lexicon(lexicon)
+    rng = random.Random(args.seed)
+    # surface words only: the corpus is preprocessed like real text
+    vocabulary = [key for key in lexicon if key.isalpha()] + ["fed up", "over the moon", "scared to death"]
+    batches = BATCHES + [random_batch(rng, vocabulary, 100) for _ in range(args.docs // 100)]
+
+    mismatches = [m for batch in batches for m in find_mismatches(batch, lexicon, compiled)]
+    for text, expected, got in mismatches[:args.show]:
+        print(f"FAIL: {text!r}\n  score_text:  {expected}\n  score_batch: {got}")
+    n_docs = sum(len(batch) for batch in batches)
+    if mismatches:
+        print(f"{len(mismatches)} of {n_docs} documents differ between score_batch and score_text.")
+        return 1
+    print(f"All {n_docs} documents in {len(batches)} batches match.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
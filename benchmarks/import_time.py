@@ -0,0 +1,86 @@
+"""Import-time budget for the headless entry points.
+
+Imports each module in a fresh interpreter with `python -X importtime`, reports
+its cumulative import time, and exits non-zero if a module goes over its budget
+or pulls in a heavy dependency that headless scoring should only load on first
+use (NLTK, NumPy) or never (tkinter, matplotlib).
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --scale 2    # looser budgets on a slow machine
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> (budget in milliseconds, top-level packages it must not import)
+BUDGETS = {
+    "src.preprocessor":   (50, ["nltk", "numpy", "matplotlib", "tkinter"]),
+    "src.emotion_scorer": (60, ["nltk", "numpy", "matplotlib", "tkinter"]),
+    "src.batch":          (80, ["nltk", "numpy", "matplotlib", "tkinter"]),
+    "src.parallel":       (120, ["nltk", "numpy", "matplotlib", "tkinter"]),
+    "src.live":           (60, ["nltk", "numpy", "matplotlib", "tkinter"]),
+    "src.streaming":      (80, ["nltk", "numpy", "matplotlib", "tkinter"]),
+    "src.visualizer":     (50, ["numpy", "matplotlib", "tkinter"]),
+    "src.render":         (50, ["numpy", "matplotlib", "tkinter"]),
+}
+
+
+def measure_import(module):
+    """Import `module` in a fresh interpreter; return (cumulative µs, imported module names)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative = None
+    imported = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        name = name.strip()
+        if cumulative_us.strip().isdigit():
+            imported.append(name)
+            if name == module:
+                cumulative = int(cumulative_us)
+    return cumulative, imported
+
+
+def check_budgets(budgets=BUDGETS, repeats=3, scale=1.0):
+    """Measure every module (best of `repeats`) and return a list of failure messages."""
+    failures = []
+    print(f"{'module':<22}{'import (ms)':>12}{'budget (ms)':>13}")
+    for module, (budget_ms, forbidden) in budgets.items():
+        runs = [measure_import(module) for _ in range(repeats)]
+        elapsed_ms = min(run[0] for run in runs) / 1000
+        limit_ms = budget_ms * scale
+        print(f"{module:<22}{elapsed_ms:>12.1f}{limit_ms:>13.0f}")
+        if elapsed_ms > limit_ms:
+            failures.append(f"{module} took {elapsed_ms:.1f} ms to import (budget {limit_ms:.0f} ms)")
+        loaded = {name.split(".")[0] for name in runs[0][1]}
+        for package in forbidden:
+            if package in loaded:
+                failures.append(f"{module} imports {package} at import time")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_time",
+                                     description="Enforce import-time budgets for headless modules.")
+    parser.add_argument("--repeats", type=int, default=3, help="runs per module; the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget by this factor")
+    args = parser.parse_args(argv)
+
+    failures = check_budgets(repeats=args.repeats, scale=args.scale)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("All import budgets met.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
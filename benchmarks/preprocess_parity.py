@@ -0,0 +1,119 @@
+"""Parity check: preprocess(mode="fast") against the NLTK pipeline (mode="accurate").
+
+Runs a fixed list of tricky inputs plus a seeded set of random ones built from
+whitespace variants, apostrophes and quotes, emoticons (alone and glued to
+words), negations, stop words, lexicon phrases and punctuation. Every input is
+checked without and with the lexicon's phrase trie. Exits non-zero if any
+input preprocesses differently in the two modes.
+
+Usage:
+    python -m benchmarks.preprocess_parity
+    python -m benchmarks.preprocess_parity --cases 20000 --seed 3
+"""
+import argparse
+import random
+import sys
+
+from src.emotion_scorer import load_lexicon
+from src.phrases import phrase_trie
+from src.preprocessor import EMOTICON_PATTERNS, preprocess
+
+CASES = [
+    "",
+    "   ",
+    "I'm so excited about the trip, but a little nervous too.",
+    "She was NOT happy about the terrible news. :(",
+    "This is extremely disgusting and I'm very angry!",
+    "I was thrilled when I got the job offer :D but terrified about moving.",
+    "  leading and trailing spaces  ",
+    "tabs\tand\nnewlines\r\nand  double  spaces",
+    "don't won't can't shouldn't isn't",
+    "'quoted' \"double quoted\" ''two singles'' ``backticks``",
+    "rock 'n' roll, the 90's, students' books, o'clock",
+    "trailing apostrophe' and 'leading one",
+    "' lone ' apostrophes ' ''",
+    ":)happy sad:( >:(angry <3<3 :-):-( D: :/",
+    "http://example.com :/ not an emoticon?",
+    "123 456 !!! ...",
+    "never again. glad it is over.",
+    "fed up, over the moon and scared to death",
+    "scared of death, sick  of\tit, down in the mouth",
+    "no\u00a0break\u00a0spaces and\u2003em spaces",
+]
+
+WORDS = [
+    "happy", "sad", "angry", "afraid", "surprised", "disgusted", "love", "hate",
+    "terrible", "wonderful", "scared", "death", "moon", "running", "cats", "quickly",
+]
+PHRASES = ["fed up", "over the moon", "scared to death", "sick of", "down in the mouth", "tired of"]
+STOP_WORDS = ["the", "a", "is", "very", "so", "up", "over", "to", "of", "i", "it", "and", "was"]
+NEGATIONS = ["not", "no", "never", "don't", "didn't", "can't", "isn't", "hardly"]
+QUOTED = ["'", "''", "\"", "`", "``", "'s", "n't", "o'", "'em", "y'all", "'tis", "90's"]
+PUNCTUATION = [".", ",", "!", "?", "...", ";", "-", "--", "(", ")", "&", "123"]
+SPACES = [" ", " ", " ", "  ", "\t", "\n", "\r\n", " \u00a0", ""]
+
+
+def random_text(rng, max_tokens=12):
+    """A random document mixing every kind of fragment the two paths must agree on."""
+    parts = []
+    for _ in range(rng.randint(0, max_tokens)):
+        kind = rng.random()
+        if kind < 0.35:
+            piece = rng.choice(WORDS)
+            if rng.random() < 0.2:
+                piece = piece.upper() if rng.random() < 0.5 else piece.capitalize()
+        elif kind < 0.42:
+            piece = rng.choice(STOP_WORDS)
+        elif kind < 0.5:
+            piece = rng.choice(PHRASES)
+        elif kind < 0.6:
+            piece = rng.choice(NEGATIONS)
+        elif kind < 0.75:
+            piece = rng.choice(QUOTED)
+            if rng.random() < 0.5:
+                piece = (rng.choice(WORDS) + piece) if rng.random() < 0.5 else (piece + rng.choice(WORDS))
+        elif kind < 0.9:
+            piece = rng.choice(EMOTICON_PATTERNS)
+            if rng.random() < 0.3:
+                piece += rng.choice(WORDS)
+        else:
+            piece = rng.choice(PUNCTUATION)
+        parts.append(piece)
+        parts.append(rng.choice(SPACES))
+    text = "".join(parts)
+    return rng.choice(SPACES) + text if rng.random() < 0.2 else text
+
+
+def find_mismatches(texts, phrases=None):
+    """Return (text, accurate, fast) for every text the two modes preprocess differently."""
+    mismatches = []
+    for text in texts:
+        accurate = preprocess(text, phrases=phrases)
+        fast = preprocess(text, mode="fast", phrases=phrases)
+        if fast != accurate:
+            mismatches.append((text, accurate, fast))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.preprocess_parity",
+                                     description="Check that fast preprocessing matches the NLTK pipeline.")
+    parser.add_argument("--cases", type=int, default=5000, help="random inputs on top of the fixed ones")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random inputs")
+    parser.add_argument("--show", type=int, default=5, help="mismatches to print")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    texts = CASES + [random_text(rng) for _ in range(args.cases)]
+    mismatches = find_mismatches(texts) + find_mismatches(texts, phrase_trie(load_lexicon()))
+    for text, accurate, fast in mismatches[:args.show]:
+        print(f"FAIL: {text!r}\n  accurate: {accurate}\n  fast:     {fast}")
+    if mismatches:
+        print(f"{len(mismatches)} of {2 * len(texts)} runs differ between the fast and accurate paths.")
+        return 1
+    print(f"All {len(texts)} inputs match, without and with phrases.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""Per-stage timings of the analysis pipeline, with a regression gate.
+
+Every stage is timed on its own, fed with the previous stage's output for the
+same synthetic documents: split_sentences, extract_emoticons, clean_text, tokenize,
+remove_stop_words, stem_tokens, score_text, plot_radar, plot_timeline (only
+for sizes whose documents have more than one sentence, so not "short"), plus
+build_lexicon against a stubbed WordNet (so it measures our code, not the
+corpus reader). The corpus is generated from the lexicon vocabulary, filler and
+modifier words and EMOTICON_PATTERNS with a fixed seed, in three sizes.
+
+Each timing is the best of --repeats runs; caches (the stem cache, the fast
+chunk cache) are warm after the first run, as they are in a long-lived process.
+
+Usage:
+    python -m benchmarks.stages run -o bench.json
+    python -m benchmarks.stages run --sizes short medium --repeats 5 -o bench.json
+    python -m benchmarks.stages compare baseline.json bench.json --threshold 0.2
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+# document sizes: name -> (documents, sentences per document)
+SIZES = {
+    "short":  (200, 1),
+    "medium": (20, 25),
+    "huge":   (1, 2000),
+}
+# figures are slow to draw; the plot stages time only the first few documents
+PLOT_DOCS = 5
+
+FILLER_WORDS = [
+    "the", "a", "and", "but", "i", "we", "it", "was", "is", "to", "of", "about",
+    "today", "after", "work", "meeting", "with", "my", "team", "because", "then",
+    "people", "city", "news", "trip", "plan", "week", "that", "this", "felt",
+]
+MODIFIER_WORDS = ["not", "never", "don't", "very", "extremely", "really", "so", "slightly", "barely"]
+SENTENCE_ENDS = [".", ".", ".", "!", "?"]
+
+
+def generate_corpus(vocabulary, emoticons, n_docs, sentences_per_doc, seed=0):
+    """Return n_docs synthetic documents of sentences_per_doc sentences each.
+
+    Sentences are 6–18 words: mostly filler, with emotion words from
+    `vocabulary`, the odd negation/intensifier in front of them, and emoticons
+    sprinkled in. The same seed always yields the same corpus.
+    """
+    rng = random.Random(seed)
+    vocabulary = sorted(vocabulary)
+    documents = []
+    for _ in range(n_docs):
+        sentences = []
+        for _ in range(sentences_per_doc):
+            words = []
+            for _ in range(rng.randint(6, 18)):
+                roll = rng.random()
+                if roll < 0.25:
+                    if rng.random() < 0.3:
+                        words.append(rng.choice(MODIFIER_WORDS))
+                    words.append(rng.choice(vocabulary))
+                elif roll < 0.3:
+                    words.append(rng.choice(emoticons))
+                else:
+                    words.append(rng.choice(FILLER_WORDS))
+            words[0] = words[0].capitalize()
+            sentences.append(" ".join(words) + rng.choice(SENTENCE_ENDS))
+        documents.append(" ".join(sentences))
+    return documents
+
+
+class _StubLemma:
+    def __init__(self, name):
+        self._name = name
+
+    def name(self):
+        return self._name
+
+
+class _StubSynset:
+    def __init__(self, names):
+        self._lemmas = [_StubLemma(n) for n in names]
+
+    def lemmas(self):
+        return self._lemmas
+
+
+class StubWordNet:
+    """Deterministic stand-in for nltk's WordNet reader: 4 synsets of 4 lemmas per word."""
+
+    def synsets(self, word):
+        return [_StubSynset([f"{word}_{s}{i}" if i else f"{word}{'ing' if s % 2 else 'ed'}"
+                             for i in range(4)])
+                for s in range(4)]
+
+
+def _time(func, repeats):
+    """Best wall time of `repeats` calls to func()."""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_stages(documents, lexicon, repeats=3):
+    """Time each pipeline stage on `documents`; returns {stage: seconds}.
+
+    The plot stages draw only the first PLOT_DOCS documents' charts.
+    plot_timeline is left out when no document has two or more sentences.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from src.emotion_scorer import score_text
+    from src.preprocessor import (
+        clean_text, extract_sentence_emoticons, remove_stop_words, split_sentences, stem_tokens, tokenize,
+    )
+    from src.visualizer import plot_radar, plot_timeline
+
+    timings = {}
+    split = [split_sentences(doc) for doc in documents]
+    timings["split_sentences"] = _time(lambda: [split_sentences(doc) for doc in documents], repeats)
+
+    extracted = [extract_sentence_emoticons(sents) for sents in split]
+    timings["extract_emoticons"] = _time(lambda: [extract_sentence_emoticons(sents) for sents in split], repeats)
+
+    def clean(sents):
+        return [clean_text(s) for s in sents]
+
+    cleaned = [clean(sents) for sents, _ in extracted]
+    timings["clean_text"] = _time(lambda: [clean(sents) for sents, _ in extracted], repeats)
+
+    def tokenize_all(sents):
+        return [words for s in sents for words in tokenize(s)]
+
+    tokenized = [tokenize_all(sents) for sents in cleaned]
+    timings["tokenize"] = _time(lambda: [tokenize_all(sents) for sents in cleaned], repeats)
+
+    filtered = [remove_stop_words(sents) for sents in tokenized]
+    timings["remove_stop_words"] = _time(lambda: [remove_stop_words(sents) for sents in tokenized], repeats)
+
+    stemmed = [stem_tokens(sents) for sents in filtered]
+    timings["stem_tokens"] = _time(lambda: [stem_tokens(sents) for sents in filtered], repeats)
+
+    scored = [score_text(sents, lexicon, found) for sents, (_, found) in zip(stemmed, extracted)]
+    timings["score_text"] = _time(
+        lambda: [score_text(sents, lexicon, found) for sents, (_, found) in zip(stemmed, extracted)], repeats)
+
+    def draw(fig):
+        if fig is not None:
+            fig.canvas.draw()
+        plt.close("all")
+
+    plotted = scored[:PLOT_DOCS]
+    timings["plot_radar"] = _time(lambda: [draw(plot_radar(r["emotions"])) for r in plotted], repeats)
+
+    # plot_timeline draws nothing for a single sentence, so time it only on documents with a timeline
+    per_sentence = [r["per_sentence"] for r in scored if len(r["per_sentence"]) >= 2][:PLOT_DOCS]
+    if per_sentence:
+        timings["plot_timeline"] = _time(lambda: [draw(plot_timeline(p)) for p in per_sentence], repeats)
+    return timings
+
+
+def time_build_lexicon(seed_words, repeats=3):
+    """Time build_lexicon with WordNet replaced by StubWordNet."""
+    from src import lexicon_builder
+    from src.preprocessor import clear_chunk_cache
+    from src.stem_cache import clear_stem_cache
+
+    original = lexicon_builder._wordnet
+    lexicon_builder._wordnet = StubWordNet
+    try:
+        def build():
+            # lexicon_key goes through the fast preprocessor, which caches chunks on
+            # top of the stems; otherwise later repeats only measure cache hits
+            clear_stem_cache()
+            clear_chunk_cache()
+            lexicon_builder.build_lexicon(seed_words)
+        return _time(build, repeats)
+    finally:
+        lexicon_builder._wordnet = original
+
+
+def run(sizes, repeats=3, seed=0):
+    """Run the whole suite; returns the JSON-ready results document."""
+    from src.emotion_scorer import load_lexicon
+    from src.lexicon_builder import load_seed_words
+    from src.preprocessor import EMOTICON_PATTERNS
+
+    lexicon = load_lexicon()
+    seed_words = load_seed_words()
+    vocabulary = set(lexicon) | {w for words in seed_words.values() for w in words}
+
+    results = {}
+    for size in sizes:
+        n_docs, n_sentences = SIZES[size]
+        documents = generate_corpus(vocabulary, EMOTICON_PATTERNS, n_docs, n_sentences, seed)
+        for stage, seconds in run_stages(documents, lexicon, repeats).items():
+            results[f"{size}/{stage}"] = seconds
+            print(f"{size + '/' + stage:<28}{seconds * 1000:>10.2f} ms", file=sys.stderr)
+    results["lexicon/build_lexicon"] = time_build_lexicon(seed_words, repeats)
+    print(f"{'lexicon/build_lexicon':<28}{results['lexicon/build_lexicon'] * 1000:>10.2f} ms", file=sys.stderr)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeats": repeats,
+            "sizes": {size: SIZES[size] for size in sizes},
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "seconds": results,
+    }
+
+
+def compare(baseline, current, threshold=0.2, min_seconds=0.001):
+    """Return (report lines, regressions) comparing two results documents.
+
+    A stage regresses when it is more than `threshold` (a fraction) slower than
+    in the baseline. Stages faster than min_seconds in both are too noisy to
+    gate on and are reported only.
+    """
+    lines, regressions = [], []
+    old, new = baseline["seconds"], current["seconds"]
+    for stage in sorted(set(old) | set(new)):
+        if stage not in old or stage not in new:
+            lines.append(f"{stage:<28}{'only in ' + ('current' if stage in new else 'baseline'):>30}")
+            continue
+        change = new[stage] / old[stage] - 1 if old[stage] else 0.0
+        gated = max(old[stage], new[stage]) >= min_seconds
+        flag = ""
+        if gated and change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(stage)
+        lines.append(f"{stage:<28}{old[stage] * 1000:>10.2f}{new[stage] * 1000:>10.2f}{change:>+9.1%}{flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stages",
+                                     description="Time each pipeline stage and gate on regressions.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="run the suite and write results as JSON")
+    run_parser.add_argument("-o", "--output", help="results file (default: print JSON to stdout)")
+    run_parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    run_parser.add_argument("--repeats", type=int, default=3, help="runs per stage; the fastest counts")
+    run_parser.add_argument("--seed", type=int, default=0, help="corpus generator seed")
+
+    compare_parser = sub.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2,
+                                help="fail if a stage is this fraction slower (default: 0.2)")
+    compare_parser.add_argument("--min-ms", type=float, default=1.0,
+                                help="don't gate stages faster than this (default: 1.0)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run(args.sizes, args.repeats, args.seed)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"Results saved to {args.output}")
+        else:
+            print(json.dumps(results, indent=2))
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    lines, regressions = compare(baseline, current, args.threshold, args.min_ms / 1000)
+    print(f"{'stage':<28}{'base (ms)':>10}{'now (ms)':>10}{'change':>9}")
+    for line in lines:
+        print(line)
+    if regressions:
+        print(f"FAIL: {len(regressions)} stage(s) regressed more than {args.threshold:.0%}")
+        return 1
+    print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
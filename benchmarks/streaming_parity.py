@@ -0,0 +1,96 @@
+"""Parity check: StreamingScorer against preprocess + score_text on the whole document.
+
+Builds documents from fixed multi-sentence cases and seeded random text with
+every kind of sentence break (". ", "!", "?", "...", line breaks, breaks with
+no space after them), feeds each one to a StreamingScorer in random chunk
+sizes, and compares the document emotions, dominant emotion, sentence and
+emoticon counts and each sentence's scores with score_text's. Exits non-zero
+on any difference.
+
+Usage:
+    python -m benchmarks.streaming_parity
+    python -m benchmarks.streaming_parity --docs 2000 --seed 3
+"""
+import argparse
+import random
+import sys
+
+from benchmarks.preprocess_parity import CASES, random_text
+from src.emotion_scorer import LEXICON_PATH, load_lexicon, score_text
+from src.preprocessor import PREPROCESS_MODES, preprocess
+from src.streaming import StreamingScorer
+
+DOCUMENTS = [
+    "Not now. I am so happy.",
+    "I am not. Happy today!",
+    "I'm not happy.\nNot sad either!\n\nJust tired :(",
+    "Wow!!! What a surprise... I was scared to death. :) :)",
+    "never.again.glad it is over? no :/ ",
+]
+BREAKS = [". ", ".", "! ", "? ", "... ", "\n", "\n\n", ".\n", "!!! ", " "]
+
+
+def random_document(rng, max_sentences=8):
+    """Random sentences from preprocess_parity.random_text joined by random sentence breaks."""
+    return "".join(random_text(rng) + rng.choice(BREAKS) for _ in range(rng.randint(0, max_sentences)))
+
+
+def stream(scorer, text, rng):
+    """Feed text to scorer in random chunk sizes; returns (sentence results, document result)."""
+    scorer.reset()
+    sentences = []
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, 40)
+        sentences.extend(scorer.feed(text[i:i + size]))
+        i += size
+    sentences.extend(scorer.finish())
+    return sentences, scorer.result()
+
+
+def find_mismatches(texts, lexicon, mode, rng):
+    """Return (text, expected, got) for each document streaming scores differently."""
+    scorer = StreamingScorer(lexicon, mode)
+    mismatches = []
+    for text in texts:
+        stemmed, _, emoticons = preprocess(text, mode, phrases=scorer.phrases)
+        expected = score_text(stemmed, lexicon, emoticons)
+        expected = {
+            "emotions": expected["emotions"],
+            "dominant": expected["dominant"],
+            "sentences": len(stemmed),
+            "emoticons": len(emoticons),
+            "per_sentence": expected["per_sentence"],
+        }
+        sentences, got = stream(scorer, text, rng)
+        got["per_sentence"] = [s["emotions"] for s in sentences]
+        if got != expected:
+            mismatches.append((text, expected, got))
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.streaming_parity",
+                                     description="Check that streamed scores match whole-document scoring.")
+    parser.add_argument("--lexicon", default=LEXICON_PATH, help="path to the emotion lexicon")
+    parser.add_argument("--docs", type=int, default=500, help="random documents on top of the fixed ones")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the documents and chunk sizes")
+    parser.add_argument("--show", type=int, default=5, help="mismatches to print")
+    args = parser.parse_args(argv)
+
+    lexicon = load_lexicon(args.lexicon)
+    rng = random.Random(args.seed)
+    texts = DOCUMENTS + CASES + [random_document(rng) for _ in range(args.docs)]
+    mismatches = [m for mode in PREPROCESS_MODES for m in find_mismatches(texts, lexicon, mode, rng)]
+    for text, expected, got in mismatches[:args.show]:
+        print(f"FAIL: {text!r}\n  score_text: {expected}\n  streamed:   {got}")
+    runs = len(texts) * len(PREPROCESS_MODES)
+    if mismatches:
+        print(f"{len(mismatches)} of {runs} runs differ between streaming and whole-document scoring.")
+        return 1
+    print(f"All {len(texts)} documents match in {', '.join(PREPROCESS_MODES)} mode.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""Headless batch scoring for large corpora.
+
+Reads JSONL, CSV or plain text one record at a time and writes one JSON line
+per document, so memory stays flat however large the input is. Only the
+preprocessor and scorer are imported — never tkinter or matplotlib.
+
+Usage:
+    python -m src.batch tickets.jsonl -o scores.jsonl
+    cat tickets.txt | python -m src.batch --format text > scores.jsonl
+    python -m src.batch tickets.jsonl --workers 32 --unordered -o scores.jsonl
+"""
+import argparse
+import csv
+import json
+import sys
+
+from src.preprocessor import PREPROCESS_MODES, preprocess
+from src.emotion_scorer import EMOTIONS, LEXICON_PATH, load_lexicon, score_text
+from src.instrumentation import PipelineStats
+from src.phrases import phrase_trie
+from src.stem_cache import stem_cache_stats
+
+INPUT_FORMATS = ["jsonl", "csv", "text"]
+
+
+def detect_format(path):
+    """Guess the input format from the file extension, defaulting to plain text."""
+    lowered = path.lower()
+    if lowered.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if lowered.endswith(".csv"):
+        return "csv"
+    return "text"
+
+
+def read_records(stream, fmt="jsonl", text_field="text", id_field="id"):
+    """Yield (record_id, text) pairs from an open stream, one line at a time.
+
+    JSONL and CSV records are read from `text_field` / `id_field`; records without
+    an id (and every plain-text line) get their 1-based line/row number instead.
+    """
+    if fmt == "jsonl":
+        for line_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {line_no}: invalid JSON ({e})") from e
+            if not isinstance(record, dict):
+                raise ValueError(f"line {line_no}: expected a JSON object, got {type(record).__name__}")
+            yield record.get(id_field, line_no), record.get(text_field) or ""
+    elif fmt == "csv":
+        for row_no, row in enumerate(csv.DictReader(stream), 1):
+            yield row.get(id_field) or row_no, row.get(text_field) or ""
+    elif fmt == "text":
+        for line_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if line:
+                yield line_no, line
+    else:
+        raise ValueError(f"unknown input format: {fmt!r} (expected one of {INPUT_FORMATS})")
+
+
+def score_document(text, lexicon, per_sentence=False, mode="accurate", stats=None):
+    """Run the full pipeline on one document and return a JSON-serializable summary."""
+    stemmed, _, emoticons = preprocess(text, mode, stats, phrase_trie(lexicon))
+    # word-level results are never written, so don't build them
+    result = score_text(stemmed, lexicon, emoticons, stats, output="sentences" if per_sentence else "summary")
+    summary = {
+        "emotions": result["emotions"],
+        "dominant": result["dominant"],
+        "sentences": len(stemmed),
+        "emoticons": emoticons,
+    }
+    if per_sentence:
+        summary["per_sentence"] = [dict(zip(EMOTIONS, scores)) for scores in result["per_sentence"]]
+    return summary
+
+
+def score_records(records, lexicon, per_sentence=False, mode="accurate", stats=None, cache=None, dedup=None):
+    """Lazily score (record_id, text) pairs, yielding one result dict per record.
+
+    With a result_cache.ResultCache, repeated texts are scored once; its
+    fingerprint must cover per_sentence and mode (see pipeline_fingerprint).
+    With a dedup.Deduplicator, near-duplicate texts share one result as well.
+    """
+    def score(text):
+        if cache is None:
+            return score_document(text, lexicon, per_sentence, mode, stats)
+        return cache.get_or_compute(text, lambda t: score_document(t, lexicon, per_sentence, mode, stats))
+
+    for record_id, text in records:
+        result = {"id": record_id}
+        result.update(score(text) if dedup is None else dedup.get_or_compute(text, score))
+        yield result
+
+
+def write_results(results, out):
+    """Write each result as a JSON line as soon as it is produced. Returns the count."""
+    count = 0
+    for result in results:
+        out.write(json.dumps(result) + "\n")
+        count += 1
+    return count
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m src.batch",
+        description="Score documents for emotions without the GUI (JSONL out).",
+    )
+    parser.add_argument("input", nargs="?", default="-",
+                        help="input file, or '-' for stdin (default)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output JSONL file, or '-' for stdout (default)")
+    parser.add_argument("--format", choices=["auto"] + INPUT_FORMATS, default="auto",
+                        help="input format (default: from the file extension, text for stdin)")
+    parser.add_argument("--text-field", default="text", help="JSONL/CSV field holding the text")
+    parser.add_argument("--id-field", default="id", help="JSONL/CSV field holding the record id")
+    parser.add_argument("--lexicon", default=LEXICON_PATH, help="path to the emotion lexicon")
+    parser.add_argument("--binary-lexicon", action="store_true",
+                        help="memory-map the binary lexicon (rebuilt from the JSON if stale)")
+    parser.add_argument("--per-sentence", action="store_true",
+                        help="include raw per-sentence scores in each result")
+    parser.add_argument("--tokenizer", choices=PREPROCESS_MODES, default="accurate",
+                        help="'fast' gives the same tokens in one cached pass (default: accurate)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes; 0 means one per CPU (default: 1, no pool)")
+    parser.add_argument("--chunksize", type=int, default=64,
+                        help="documents sent to a worker per task (default: 64)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="with --workers, write results as they finish instead of in input order")
+    parser.add_argument("--warm-stems", action="store_true",
+                        help="pre-warm the stem cache with the lexicon's source words at startup")
+    parser.add_argument("--stats", metavar="FILE",
+                        help="write pipeline timings and lexicon/modifier counters as JSON ('-' for stderr)")
+    parser.add_argument("--cache-size", type=int, default=0,
+                        help="remember results for this many distinct texts (default: 0, off)")
+    parser.add_argument("--cache-db", metavar="PATH",
+                        help="also keep cached results in this SQLite file across runs")
+    parser.add_argument("--dedup", action="store_true",
+                        help="score duplicate and near-duplicate texts once and copy the result")
+    parser.add_argument("--dedup-size", type=int, default=100000,
+                        help="fingerprints remembered for --dedup (default: 100000)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if (args.cache_size or args.cache_db) and args.workers != 1:
+        parser.error("--cache-size/--cache-db only work with --workers 1")
+    if args.dedup and args.unordered:
+        parser.error("--dedup keeps input order; drop --unordered")
+
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "text" if args.input == "-" else detect_format(args.input)
+
+    src = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    stats = PipelineStats() if args.stats else None
+    cache = None
+    dedup = None
+    if args.dedup:
+        from src.dedup import Deduplicator
+        dedup = Deduplicator(args.dedup_size)
+    try:
+        records = read_records(src, fmt, args.text_field, args.id_field)
+        if args.workers == 1:
+            # load once, shared by every document
+            lexicon = load_lexicon(args.lexicon, args.warm_stems, args.binary_lexicon)
+            if args.cache_size or args.cache_db:
+                from src.result_cache import ResultCache, pipeline_fingerprint
+                fingerprint = pipeline_fingerprint(lexicon, args.tokenizer, args.per_sentence)
+                cache = ResultCache(fingerprint, args.cache_size or 10000, args.cache_db)
+            results = score_records(records, lexicon, args.per_sentence, args.tokenizer, stats, cache, dedup)
+        else:
+            from src.parallel import score_parallel
+            results = score_parallel(records, args.workers or None, args.chunksize,
+                                     not args.unordered, args.lexicon, args.per_sentence,
+                                     args.warm_stems, args.tokenizer, args.binary_lexicon, stats, dedup)
+        count = write_results(results, out)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+        if cache is not None:
+            cache.close()
+
+    print(f"Scored {count} documents", file=sys.stderr)
+    if args.workers == 1:
+        print(f"Stem cache: {stem_cache_stats()}", file=sys.stderr)
+    if cache is not None:
+        print(f"Result cache: {cache.stats()}", file=sys.stderr)
+    if dedup is not None:
+        print(f"Dedup: {dedup.stats()}", file=sys.stderr)
+    if stats is not None:
+        if args.stats == "-":
+            print(f"Pipeline stats: {stats.to_json()}", file=sys.stderr)
+        else:
+            with open(args.stats, "w") as f:
+                f.write(stats.to_json(indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""Array-backed lexicon and vectorized scoring.
+
+The dict lexicon maps stems to {emotion: score} dicts, and score_sentence builds
+new dicts for every negated or intensified hit. CompiledLexicon maps every known
+token to an integer id instead and keeps the scores in one dense
+(vocab × len(EMOTIONS)) matrix, so scoring a sentence becomes a gather over a
+token-id array plus a masked matrix multiply. Results match score_text.
+Phrase entries are ordinary vocabulary tokens: preprocess, given the phrase
+trie, hands a matched phrase over as a single token.
+"""
+import numpy as np
+
+from src.emotion_scorer import (
+    EMOTIONS, EMOTION_FLIP, modifier_tables, normalize_emotions, score_emoticons,
+)
+from src.phrases import build_phrase_trie, is_phrase
+from src.preprocessor import preprocess
+
+# token kinds
+PLAIN, NEGATION, INTENSIFIER = 0, 1, 2
+
+# Lexicon scores are short decimals (0.6, 0.9, ...). Rounding the gathered float32
+# rows back to this many places undoes the storage error, so sums match score_text.
+_SCORE_DECIMALS = 6
+
+
+class CompiledLexicon:
+    """A lexicon compiled to integer token ids and dense NumPy arrays.
+
+    Attributes:
+        vocab:      {token: id} for every lexicon stem and modifier word
+        unknown_id: id used for out-of-vocabulary tokens (an all-zero row)
+        scores:     (len(vocab) + 1, len(EMOTIONS)) emotion scores per id
+        kinds:      PLAIN / NEGATION / INTENSIFIER per id
+        multipliers: intensifier multiplier per id (1.0 for everything else)
+        flip:       (len(EMOTIONS), len(EMOTIONS)) mixing matrix; row @ flip
+                    applies EMOTION_FLIP at half intensity, like apply_negation
+        phrases:    trie of the lexicon's phrase keys (see src.phrases), or None;
+                    pass it to preprocess so phrases arrive as single tokens
+    """
+
+    def __init__(self, vocab, scores, kinds, multipliers, flip, phrases=None):
+        self.vocab = vocab
+        self.unknown_id = len(vocab)
+        self.scores = scores
+        self.kinds = kinds
+        self.multipliers = multipliers
+        self.flip = flip
+        self.phrases = phrases
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def encode(self, tokens):
+        """Map one sentence's stemmed tokens to an int32 id array."""
+        return self.encode_sentences([tokens])
+
+    def encode_sentences(self, sentences):
+        """Map several sentences' tokens to one concatenated int32 id array."""
+        vocab, unknown = self.vocab, self.unknown_id
+        count = sum(len(tokens) for tokens in sentences)
+        return np.fromiter((vocab.get(t, unknown) for tokens in sentences for t in tokens),
+                           dtype=np.int32, count=count)
+
+
+def build_flip_matrix(emotions=EMOTIONS, flip_map=EMOTION_FLIP, factor=0.5):
+    """Return the mixing matrix that sends each emotion to its flip target, scaled by factor."""
+    index = {e: i for i, e in enumerate(emotions)}
+    flip = np.zeros((len(emotions), len(emotions)))
+    for emotion, i in index.items():
+        flip[i, index[flip_map.get(emotion, emotion)]] = factor
+    return flip
+
+
+def compile_lexicon(lexicon, dtype=np.float32):
+    """Compile a {stem: {emotion: score}} lexicon into a CompiledLexicon."""
+    negation_words, intensifiers = modifier_tables()
+    emotion_index = {e: i for i, e in enumerate(EMOTIONS)}
+    vocab = {}
+    for token in lexicon:
+        vocab[token] = len(vocab)
+    for token in list(negation_words) + list(intensifiers):
+        vocab.setdefault(token, len(vocab))
+    phrases = build_phrase_trie(key for key in lexicon if is_phrase(key))
+
+    size = len(vocab) + 1  # trailing all-zero row for unknown tokens
+    scores = np.zeros((size, len(EMOTIONS)), dtype=dtype)
+    for token, emotions in lexicon.items():
+        row = scores[vocab[token]]
+        for emotion, score in emotions.items():
+            row[emotion_index[emotion]] = score
+
+    kinds = np.full(size, PLAIN, dtype=np.int8)
+    multipliers = np.ones(size)
+    for token, multiplier in intensifiers.items():
+        kinds[vocab[token]] = INTENSIFIER
+        multipliers[vocab[token]] = multiplier
+    # negation is checked first in score_sentence, so it wins for words in both sets
+    for token in negation_words:
+        kinds[vocab[token]] = NEGATION
+        multipliers[vocab[token]] = 1.0
+
+    return CompiledLexicon(vocab, scores, kinds, multipliers, build_flip_matrix(), phrases or None)
+
+
+def score_token_ids(compiled, ids, sentence_index, n_sentences):
+    """Score a flat array of token ids spanning one or more sentences.
+
+    A negation or intensifier applies to the next plain token in the same sentence;
+    every plain token resets both, whether or not it is in the lexicon.
+
+    Args:
+        compiled: a CompiledLexicon
+        ids: int array of token ids, all sentences concatenated
+        sentence_index: sentence number of each token (non-decreasing)
+        n_sentences: total number of sentences, including empty ones
+
+    Returns:
+        plain_positions: positions in ids of the plain (non-modifier) tokens
+        word_scores: (len(plain_positions), len(EMOTIONS)) adjusted scores
+        sentence_totals: (n_sentences, len(EMOTIONS)) summed scores per sentence
+    """
+    kinds = compiled.kinds[ids]
+    plain = kinds == PLAIN
+    # Modifiers share a group with the plain token that follows them. Adding the
+    # sentence number stops a trailing modifier reaching into the next sentence.
+    group = np.cumsum(plain) - plain + sentence_index
+    n_groups = int(group[-1]) + 1 if len(ids) else 0
+
+    negated = np.zeros(n_groups, dtype=bool)
+    negated[group[kinds == NEGATION]] = True
+
+    multiplier = np.ones(n_groups)
+    intensifier_positions = np.flatnonzero(kinds == INTENSIFIER)
+    if len(intensifier_positions):
+        # only the last intensifier before a word counts
+        groups = group[intensifier_positions]
+        last = np.append(groups[1:] != groups[:-1], True)
+        multiplier[groups[last]] = compiled.multipliers[ids[intensifier_positions[last]]]
+
+    plain_positions = np.flatnonzero(plain)
+    plain_groups = group[plain_positions]
+    word_scores = np.round(compiled.scores[ids[plain_positions]].astype(np.float64), _SCORE_DECIMALS)
+
+    flip_rows = negated[plain_groups]
+    if flip_rows.any():
+        word_scores[flip_rows] = word_scores[flip_rows] @ compiled.flip
+    word_scores = np.minimum(word_scores * multiplier[plain_groups, None], 1.0)
+
+    sentence_totals = _sum_rows_by(sentence_index[plain_positions], word_scores, n_sentences)
+    return plain_positions, word_scores, sentence_totals
+
+
+def _sum_rows_by(index, rows, n):
+    """Sum the rows of a (k × len(EMOTIONS)) array into n buckets, in order."""
+    if not n:
+        return np.zeros((0, len(EMOTIONS)))
+    # bincount gives int64 when there is nothing to sum; keep totals float either way
+    return np.column_stack([
+        np.bincount(index, weights=rows[:, k], minlength=n) for k in range(len(EMOTIONS))
+    ]).astype(np.float64, copy=False)
+
+
+def _word_results(tokens, plain_positions, word_scores, offset=0):
+    """Rebuild score_sentence's [(token, {emotion: score})] list for one sentence.
+
+    plain_positions and word_scores are plain lists here; per-row NumPy calls
+    would cost more than the scoring itself.
+    """
+    results = [(token, {}) for token in tokens]
+    for position, row in zip(plain_positions, word_scores):
+        if any(row):
+            position -= offset
+            results[position] = (tokens[position], {e: s for e, s in zip(EMOTIONS, row) if s})
+    return results
+
+
+def score_sentence_compiled(tokens, compiled):
+    """Vectorized score_sentence. Returns (sentence_emotions, word_results)."""
+    ids = compiled.encode(tokens)
+    plain_positions, word_scores, totals = score_token_ids(
+        compiled, ids, np.zeros(len(ids), dtype=np.intp), 1)
+    sentence_emotions = dict(zip(EMOTIONS, totals[0].tolist()))
+    return sentence_emotions, _word_results(tokens, plain_positions.tolist(), word_scores.tolist())
+
+
+def _split_word_results(stemmed_sentences, lengths, plain_positions, word_scores):
+    """Split flat per-word scores back into one word_results list per sentence."""
+    starts = np.cumsum([0] + lengths)
+    cuts = np.searchsorted(plain_positions, starts).tolist()
+    starts = starts.tolist()
+    plain_positions = plain_positions.tolist()
+    word_scores = word_scores.tolist()
+    return [
+        _word_results(sentence, plain_positions[cuts[i]:cuts[i + 1]],
+                      word_scores[cuts[i]:cuts[i + 1]], starts[i])
+        for i, sentence in enumerate(stemmed_sentences)
+    ]
+
+
+def score_text_compiled(stemmed_sentences, compiled, emoticons=None):
+    """Vectorized score_text: same arguments (with a CompiledLexicon) and same result dict."""
+    lengths = [len(tokens) for tokens in stemmed_sentences]
+    ids = compiled.encode_sentences(stemmed_sentences)
+    sentence_index = np.repeat(np.arange(len(lengths)), lengths)
+    plain_positions, word_scores, totals = score_token_ids(
+        compiled, ids, sentence_index, len(lengths))
+
+    all_word_results = _split_word_results(stemmed_sentences, lengths, plain_positions, word_scores)
+    all_emotions = dict(zip(EMOTIONS, totals.sum(axis=0).tolist()))
+    sentence_scores = [dict(zip(EMOTIONS, row)) for row in totals.tolist()]
+    if emoticons:
+        for emotion, score in score_emoticons(emoticons).items():
+            all_emotions[emotion] += score
+
+    normalized, dominant = normalize_emotions(all_emotions)
+    return {
+        "emotions": normalized,
+        "dominant": dominant,
+        "per_sentence": sentence_scores,
+        "word_results": all_word_results,
+    }
+
+
+def score_batch(texts, compiled, per_sentence=False, word_results=False, mode="accurate"):
+    """Preprocess and score many documents together, returning columnar results.
+
+    All documents' tokens are concatenated and scored in a single
+    score_token_ids call, so per-document Python overhead is just preprocessing.
+
+    Args:
+        texts: list or iterator of raw document strings
+        compiled: a CompiledLexicon
+        per_sentence: also return raw per-sentence scores and their offsets
+        word_results: also build score_text-style word_results per document
+                      (only needed for highlighting)
+        mode: preprocessing mode, "accurate" or "fast"
+
+    Returns a dict with:
+        emotions:          (n_docs × len(EMOTIONS)) normalized 0.0–1.0 scores
+        dominant:          (n_docs,) index into EMOTIONS of the top emotion
+        sentence_offsets:  (n_docs + 1,) rows of per_sentence belonging to each
+                           document, or None
+        per_sentence:      (n_sentences × len(EMOTIONS)) raw scores, or None
+        word_results:      list with one score_text-style word_results per document, or None
+    """
+    all_sentences = []
+    sentence_counts = []
+    emoticon_scores = []
+    for text in texts:
+        stemmed, _, emoticons = preprocess(text, mode, phrases=compiled.phrases)
+        all_sentences.extend(stemmed)
+        sentence_counts.append(len(stemmed))
+        emoticon_scores.append([score_emoticons(emoticons)[e] for e in EMOTIONS] if emoticons
+                               else [0.0] * len(EMOTIONS))
+
+    n_docs = len(sentence_counts)
+    lengths = [len(tokens) for tokens in all_sentences]
+    ids = compiled.encode_sentences(all_sentences)
+    sentence_index = np.repeat(np.arange(len(lengths)), lengths)
+    plain_positions, word_scores, sentence_totals = score_token_ids(
+        compiled, ids, sentence_index, len(lengths))
+
+    doc_of_sentence = np.repeat(np.arange(n_docs), sentence_counts)
+    totals = _sum_rows_by(doc_of_sentence, sentence_totals, n_docs)
+    totals += np.array(emoticon_scores).reshape(n_docs, len(EMOTIONS))
+
+    max_scores = totals.max(axis=1, keepdims=True) if n_docs else np.ones((0, 1))
+    ratios = totals / np.where(max_scores > 0, max_scores, 1)
+    # Python's round, not np.round, so half-way ratios come out exactly as in score_text
+    normalized = np.array([[round(r, 2) for r in row] for row in ratios.tolist()])
+    normalized = normalized.reshape(n_docs, len(EMOTIONS))
+    offsets = np.concatenate([[0], np.cumsum(sentence_counts)]).astype(np.intp)
+
+    doc_word_results = None
+    if word_results:
+        flat = _split_word_results(all_sentences, lengths, plain_positions, word_scores)
+        doc_word_results = [flat[offsets[i]:offsets[i + 1]] for i in range(n_docs)]
+
+    return {
+        "emotions": normalized,
+        "dominant": normalized.argmax(axis=1) if n_docs else np.zeros(0, dtype=np.intp),
+        "sentence_offsets": offsets if per_sentence else None,
+        "per_sentence": sentence_totals if per_sentence else None,
+        "word_results": doc_word_results,
+    }
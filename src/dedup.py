@@ -0,0 +1,90 @@
+"""Duplicate and near-duplicate collapsing for batch scoring.
+
+Exports repeat the same message with trivial differences. near_duplicate_key
+fingerprints a document the way the preprocessor sees it: the text is split
+into sentences, emoticons are pulled out, each sentence is cleaned
+(lowercased, punctuation dropped), whitespace is collapsed, URLs are removed
+and runs of the same emoticon count once.
+Documents with the same fingerprint are scored once, and that result is
+handed to every row that shares it.
+
+Casing, spacing and punctuation inside a sentence never reach the scorer, so
+those duplicates get exactly their own score; sentence breaks do, so they are
+part of the fingerprint. A URL or a repeated emoticon can shift a score a
+little; such rows get the score of the first row with their fingerprint.
+"""
+import hashlib
+import re
+from collections import OrderedDict
+
+from src.preprocessor import clean_text, extract_emoticons, split_sentences
+
+_URL_RE = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+
+
+def near_duplicate_key(text):
+    """16-byte fingerprint shared by documents that differ only trivially."""
+    sentences, emoticons = [], []
+    for sentence in split_sentences(text):
+        # URLs first: "https://" would otherwise yield a ":/" emoticon
+        sentence, found = extract_emoticons(_URL_RE.sub(" ", sentence))
+        emoticons.extend(found)
+        sentence = " ".join(clean_text(sentence).split())
+        if sentence:
+            sentences.append(sentence)
+    emoticons = [e for i, e in enumerate(emoticons) if not i or e != emoticons[i - 1]]
+    data = "\n".join(sentences) + "\0" + " ".join(emoticons)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+
+class Deduplicator:
+    """Bounded LRU from near-duplicate fingerprint to result, counting duplicates.
+
+    Only the maxsize most recently seen fingerprints are kept, so memory stays
+    flat on unbounded streams; a duplicate of an evicted one is scored again.
+    get_or_compute(text, compute) has the same shape as ResultCache's, so it
+    can stand in for the cache in batch.score_records.
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self.documents = 0
+        self.duplicates = 0
+
+    def key(self, text):
+        return near_duplicate_key(text)
+
+    def lookup(self, key):
+        """Count one document and return what is stored for its key, or None."""
+        self.documents += 1
+        value = self._results.get(key)
+        if value is not None:
+            self._results.move_to_end(key)
+            self.duplicates += 1
+        return value
+
+    def store(self, key, value):
+        self._results[key] = value
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def get_or_compute(self, text, compute):
+        key = self.key(text)
+        value = self.lookup(key)
+        if value is None:
+            value = compute(text)
+            self.store(key, value)
+        return value
+
+    def stats(self):
+        """Documents seen, how many were scored and the share that were duplicates."""
+        return {
+            "documents": self.documents,
+            "scored": self.documents - self.duplicates,
+            "duplicates": self.duplicates,
+            "dedup_ratio": round(self.duplicates / self.documents, 4) if self.documents else 0.0,
+            "size": len(self._results),
+            "maxsize": self.maxsize,
+        }
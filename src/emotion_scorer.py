@@ -1,25 +1,26 @@
 import json
 import os
+import time
+from functools import lru_cache
 
-from nltk.stem import PorterStemmer
-
-stemmer = PorterStemmer()
+from src.stem_cache import stem, warm_stem_cache
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LEXICON_PATH = os.path.join(PROJECT_ROOT, "data", "emotion_lexicon.json")
 
 EMOTIONS = ["joy", "anger", "sadness", "fear", "surprise", "disgust"]
+EMOTION_INDEX = {e: i for i, e in enumerate(EMOTIONS)}
+
+# What score_text / score_sentence build (see score_text)
+OUTPUT_MODES = ["full", "sentences", "summary", "compact"]
 
 # --- Negation ---
-# Stemmed forms since the preprocessor stems tokens before they reach the scorer
-NEGATION_WORDS = {
-    stemmer.stem(w) for w in [
-        "not", "no", "never", "neither", "hardly", "barely",
-        "don't", "doesn't", "didn't", "won't", "can't",
-        "couldn't", "wouldn't", "shouldn't", "isn't",
-        "aren't", "wasn't", "weren't",
-    ]
-}
+NEGATION_BASE_WORDS = [
+    "not", "no", "never", "neither", "hardly", "barely",
+    "don't", "doesn't", "didn't", "won't", "can't",
+    "couldn't", "wouldn't", "shouldn't", "isn't",
+    "aren't", "wasn't", "weren't",
+]
 
 EMOTION_FLIP = {
     "joy":      "sadness",
@@ -31,16 +32,36 @@ EMOTION_FLIP = {
 }
 
 # --- Intensifiers ---
-# Map stemmed forms to their multiplier
-INTENSIFIERS = {
-    stemmer.stem(k): v for k, v in {
-        "very": 1.5, "extremely": 1.8, "incredibly": 1.7,
-        "really": 1.4, "so": 1.3,
-        "slightly": 0.5, "barely": 0.4, "somewhat": 0.6,
-        "quite": 1.3,
-    }.items()
+# Map plain forms to their multiplier
+INTENSIFIER_BASE_WORDS = {
+    "very": 1.5, "extremely": 1.8, "incredibly": 1.7,
+    "really": 1.4, "so": 1.3,
+    "slightly": 0.5, "barely": 0.4, "somewhat": 0.6,
+    "quite": 1.3,
 }
 
+
+@lru_cache(maxsize=None)
+def modifier_tables():
+    """Return the stemmed (NEGATION_WORDS, INTENSIFIERS) tables.
+
+    Stemmed forms since the preprocessor stems tokens before they reach the scorer.
+    Built on first use rather than at import, so importing the scorer doesn't load NLTK.
+    """
+    negation_words = frozenset(stem(w) for w in NEGATION_BASE_WORDS)
+    intensifiers = {stem(k): v for k, v in INTENSIFIER_BASE_WORDS.items()}
+    return negation_words, intensifiers
+
+
+def __getattr__(name):
+    # NEGATION_WORDS and INTENSIFIERS are computed lazily by modifier_tables()
+    if name == "NEGATION_WORDS":
+        return modifier_tables()[0]
+    if name == "INTENSIFIERS":
+        return modifier_tables()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # --- Emoji / Emoticon Map ---
 EMOJI_MAP = {
     ":)":  {"joy": 0.7},
@@ -56,9 +77,31 @@ EMOJI_MAP = {
 }
 
 
-def load_lexicon(path=LEXICON_PATH):
-    with open(path) as f:
-        return json.load(f)
+def warm_lexicon_stems():
+    """Pre-stem the surface words behind the lexicon (lexicon_builder.source_words).
+
+    Lexicon keys are stems already, so warming with them would barely help:
+    documents send the unstemmed words to the stemmer.
+    """
+    from src.lexicon_builder import source_words
+    warm_stem_cache(source_words())
+
+
+def load_lexicon(path=LEXICON_PATH, warm_stems=False, binary=False):
+    """Load the lexicon JSON; optionally pre-warm the shared stem cache (see warm_lexicon_stems).
+
+    With binary=True the memory-mapped companion file (see lexicon_format) is opened
+    instead of parsing the JSON; it is rebuilt from the JSON if missing or stale.
+    """
+    if binary:
+        from src.lexicon_format import load_binary_lexicon
+        lexicon = load_binary_lexicon(path, EMOTIONS)
+    else:
+        with open(path) as f:
+            lexicon = json.load(f)
+    if warm_stems:
+        warm_lexicon_stems()
+    return lexicon
 
 
 def score_word(word, lexicon):
@@ -82,102 +125,183 @@ def apply_intensifier(emotion_scores, multiplier):
     return {emotion: min(score * multiplier, 1.0) for emotion, score in emotion_scores.items()}
 
 
-def score_emoticons(emoticons):
+def score_emoticons(emoticons, stats=None):
     """Score a list of emoticon strings found by the preprocessor."""
     totals = {e: 0 for e in EMOTIONS}
+    scored = 0
     for emoticon in emoticons:
-        for emotion, score in EMOJI_MAP.get(emoticon, {}).items():
+        scores = EMOJI_MAP.get(emoticon, {})
+        scored += bool(scores)
+        for emotion, score in scores.items():
             totals[emotion] += score
+    if stats is not None:
+        stats.add(emoticons_scored=scored)
     return totals
 
 
-def score_sentence(tokens, lexicon):
+def score_sentence(tokens, lexicon, stats=None, output="full"):
     """Score a single sentence (stemmed tokens).
 
-    Returns a dict of emotion totals and a list of (token, {emotion: score}) for highlighting.
+    Returns a dict of emotion totals and the word-level results for highlighting:
+    with output="full" a list of (token, {emotion: score}), with "compact" a list
+    of (token_offset, emotion_index, score) for the scored words only, and None
+    for "summary"/"sentences". An optional instrumentation.PipelineStats gets
+    lexicon hit/miss and modifier counts.
+
+    A phrase entry in the lexicon arrives as one token already (see preprocess's
+    phrases argument), so it is scored like any word and takes a preceding
+    negation or intensifier.
     """
+    if output not in OUTPUT_MODES:
+        raise ValueError(f"unknown output mode: {output!r} (expected one of {OUTPUT_MODES})")
+    negation_words, intensifiers = modifier_tables()
     sentence_emotions = {e: 0 for e in EMOTIONS}
-    word_results = []
+    full = output == "full"
+    compact = output == "compact"
+    word_results = [] if full or compact else None
     negated = False
     multiplier = 1.0
+    # counters for stats; only bumped on branches that already do work
+    negations = intensifier_count = hits = negations_applied = intensifiers_applied = phrases = 0
 
-    for token in tokens:
+    for offset, token in enumerate(tokens):
         # check for negation
-        if token in NEGATION_WORDS:
+        if token in negation_words:
             negated = True
-            word_results.append((token, {}))
+            negations += 1
+            if full:
+                word_results.append((token, {}))
             continue
 
         # check for intensifier
-        if token in INTENSIFIERS:
-            multiplier = INTENSIFIERS[token]
-            word_results.append((token, {}))
+        if token in intensifiers:
+            multiplier = intensifiers[token]
+            intensifier_count += 1
+            if full:
+                word_results.append((token, {}))
             continue
 
         # score the word
         raw_scores = score_word(token, lexicon)
         if raw_scores:
+            hits += 1
+            phrases += " " in token
+            negations_applied += negated
+            intensifiers_applied += multiplier != 1.0
             adjusted = apply_negation(raw_scores, negated)
             adjusted = apply_intensifier(adjusted, multiplier)
             for emotion, score in adjusted.items():
                 sentence_emotions[emotion] += score
-            word_results.append((token, adjusted))
-        else:
+            if full:
+                word_results.append((token, adjusted))
+            elif compact:
+                for emotion, score in adjusted.items():
+                    word_results.append((offset, EMOTION_INDEX[emotion], score))
+        elif full:
             word_results.append((token, {}))
 
         # reset modifiers after an emotion word is processed
         negated = False
         multiplier = 1.0
 
+    if stats is not None:
+        stats.add(
+            sentences=1,
+            lexicon_hits=hits,
+            lexicon_misses=len(tokens) - negations - intensifier_count - hits,
+            negations=negations,
+            negations_applied=negations_applied,
+            intensifiers=intensifier_count,
+            intensifiers_applied=intensifiers_applied,
+            phrases=phrases,
+        )
     return sentence_emotions, word_results
 
 
-def score_text(stemmed_sentences, lexicon, emoticons=None):
+def normalize_emotions(totals):
+    """Scale raw emotion totals to 0.0–1.0 and pick the dominant emotion.
+
+    Returns (normalized, dominant).
+    """
+    max_score = max(totals.values()) if max(totals.values()) > 0 else 1
+    normalized = {e: round(s / max_score, 2) for e, s in totals.items()}
+    dominant = max(normalized, key=normalized.get)
+    return normalized, dominant
+
+
+def score_text(stemmed_sentences, lexicon, emoticons=None, stats=None, output="full"):
     """Score the full text.
 
     Args:
         stemmed_sentences: list of lists of stemmed tokens from the preprocessor
         lexicon: the emotion lexicon dict
         emoticons: optional list of emoticon strings found by the preprocessor
+        stats: optional instrumentation.PipelineStats to record the "score" stage
+               time and lexicon/modifier/emoticon counters in
+        output: how much to build, one of OUTPUT_MODES:
+                "full"       everything below (default)
+                "summary"    only emotions and dominant
+                "sentences"  emotions, dominant and per_sentence as vectors
+                "compact"    as "sentences", plus compact word_results
 
     Returns a dict with:
         emotions:      normalized 0.0–1.0 scores per emotion
         dominant:       the highest-scoring emotion
-        per_sentence:  list of raw score dicts per sentence
-        word_results:  list of lists of (token, {emotion: score})
+        per_sentence:  list of raw score dicts per sentence ("full"), or of
+                       raw score lists in EMOTIONS order ("sentences", "compact")
+        word_results:  list of lists of (token, {emotion: score}) ("full"), or of
+                       (token_offset, emotion_index, score) per scored word ("compact")
     """
+    if output not in OUTPUT_MODES:
+        raise ValueError(f"unknown output mode: {output!r} (expected one of {OUTPUT_MODES})")
+    started = time.perf_counter() if stats is not None else None
     all_emotions = {e: 0 for e in EMOTIONS}
     sentence_scores = []
     all_word_results = []
 
     for tokens in stemmed_sentences:
-        sent_emotions, word_results = score_sentence(tokens, lexicon)
-        sentence_scores.append(sent_emotions)
-        all_word_results.append(word_results)
+        sent_emotions, word_results = score_sentence(tokens, lexicon, stats, output)
+        if output == "full":
+            sentence_scores.append(sent_emotions)
+            all_word_results.append(word_results)
+        elif output != "summary":
+            sentence_scores.append([sent_emotions[e] for e in EMOTIONS])
+            if word_results is not None:
+                all_word_results.append(word_results)
         for emotion, score in sent_emotions.items():
             all_emotions[emotion] += score
 
     # add emoticon scores to the totals
     if emoticons:
-        emoji_scores = score_emoticons(emoticons)
+        emoji_scores = score_emoticons(emoticons, stats)
         for emotion, score in emoji_scores.items():
             all_emotions[emotion] += score
 
-    # normalize to 0.0–1.0 range
-    max_score = max(all_emotions.values()) if max(all_emotions.values()) > 0 else 1
-    normalized = {e: round(s / max_score, 2) for e, s in all_emotions.items()}
+    normalized, dominant = normalize_emotions(all_emotions)
+    if stats is not None:
+        stats.add_time("score", time.perf_counter() - started)
+
+    result = {"emotions": normalized, "dominant": dominant}
+    if output != "summary":
+        result["per_sentence"] = sentence_scores
+    if output in ("full", "compact"):
+        result["word_results"] = all_word_results
+    return result
 
-    dominant = max(normalized, key=normalized.get)
 
-    return {
-        "emotions": normalized,
-        "dominant": dominant,
-        "per_sentence": sentence_scores,
-        "word_results": all_word_results,
-    }
+def expand_compact(word_results, stemmed_sentences):
+    """Turn compact word_results back into the "full" [(token, {emotion: score})] form."""
+    expanded = []
+    for hits, tokens in zip(word_results, stemmed_sentences):
+        sentence = [(token, {}) for token in tokens]
+        for offset, emotion_index, score in hits:
+            sentence[offset][1][EMOTIONS[emotion_index]] = score
+        expanded.append(sentence)
+    return expanded
 
 
 if __name__ == "__main__":
+    from src.phrases import phrase_trie
     from src.preprocessor import preprocess
 
     lexicon = load_lexicon()
@@ -187,11 +311,12 @@ if __name__ == "__main__":
         "She was NOT happy about the terrible news. :(",
         "This is extremely disgusting and I'm very angry!",
         "I was thrilled when I got the job offer, but terrified about moving to a new city.",
+        "I was scared to death, but now I'm over the moon.",
     ]
 
     for text in test_texts:
         print(f"\nInput: {text}")
-        stemmed, original, emoticons = preprocess(text)
+        stemmed, original, emoticons = preprocess(text, phrases=phrase_trie(lexicon))
         result = score_text(stemmed, lexicon, emoticons)
         print(f"  Dominant: {result['dominant']}")
         print(f"  Scores:   {result['emotions']}")
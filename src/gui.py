@@ -1,14 +1,40 @@
+import queue
+import threading
 import tkinter as tk
-from tkinter import scrolledtext
+from tkinter import scrolledtext, ttk
 
-import matplotlib
-matplotlib.use("TkAgg")
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from src.lexicon_manager import LexiconManager
+from src.live import LiveAnalyzer, line_edits
+from src.visualizer import EmotionCharts, get_word_color
 
-from src.preprocessor import preprocess
-from src.emotion_scorer import load_lexicon, score_text
-from src.visualizer import plot_radar, plot_timeline, get_word_color
+
+def _tk_canvas_class():
+    """Import matplotlib with the Tk backend on first use, so the window opens without it."""
+    import matplotlib
+    matplotlib.use("TkAgg")
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    return FigureCanvasTkAgg
+
+
+# how often the main loop checks for a finished analysis
+POLL_INTERVAL_MS = 50
+# live mode waits for this long a pause in typing before re-scoring
+LIVE_DEBOUNCE_MS = 300
+
+
+def _analysis_worker(job, task, cancel, results):
+    """Run task(cancel) on a background thread and post (job, outcome) to the results queue.
+
+    Nothing here touches Tk — widgets may only be updated from the main thread.
+    A superseded job's cancel event is set: the task should check it and stop
+    early (LiveAnalyzer.analyze does, between sentences), and its outcome is dropped.
+    """
+    try:
+        outcome = task(cancel)
+    except Exception as e:  # report it in the window instead of dying silently
+        outcome = e
+    if not cancel.is_set():
+        results.put((job, outcome))
 
 
 class EmotionApp:
@@ -16,7 +42,23 @@ class EmotionApp:
         self.root = root
         self.root.title("Emotion Analyzer")
 
-        self.lexicon = load_lexicon()
+        # picks up a rebuilt lexicon file without restarting the app
+        self.lexicons = LexiconManager().start()
+
+        # background analysis state: only the latest job's result is shown
+        self._results = queue.Queue()
+        self._job = 0
+        self._cancel = threading.Event()
+        self._polling = False
+        self._running = False
+        self._on_result = None
+
+        # live mode: per-sentence result cache, pending debounce timer and the
+        # sentence keys currently shown in output_text (None = redraw everything)
+        self.live = LiveAnalyzer(self.lexicons.snapshot.lexicon)
+        self.live_var = tk.BooleanVar(value=False)
+        self._live_after = None
+        self._shown_keys = None
 
         # --- Input Section ---
         input_label = tk.Label(root, text="Enter text to analyze:", anchor="w")
@@ -24,6 +66,7 @@ class EmotionApp:
 
         self.input_text = scrolledtext.ScrolledText(root, height=8, wrap=tk.WORD)
         self.input_text.pack(padx=10, pady=(5, 5), fill=tk.X)
+        self.input_text.bind("<<Modified>>", self._on_input_modified)
 
         btn_frame = tk.Frame(root)
         btn_frame.pack(pady=5)
@@ -34,6 +77,13 @@ class EmotionApp:
         self.clear_btn = tk.Button(btn_frame, text="Clear", command=self.clear)
         self.clear_btn.pack(side=tk.LEFT, padx=5)
 
+        self.live_check = tk.Checkbutton(btn_frame, text="Live", variable=self.live_var,
+                                         command=self._on_input_modified)
+        self.live_check.pack(side=tk.LEFT, padx=5)
+
+        # shown only while an analysis is running
+        self.progress = ttk.Progressbar(btn_frame, mode="indeterminate", length=120)
+
         # --- Highlighted Output Section ---
         output_label = tk.Label(root, text="Highlighted output:", anchor="w")
         output_label.pack(padx=10, pady=(5, 0), fill=tk.X)
@@ -48,9 +98,20 @@ class EmotionApp:
         # --- Charts Frame ---
         self.chart_frame = tk.Frame(root)
         self.chart_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        # figures and canvases are created on the first analysis, then reused
+        self.charts = None
+        self._radar_widget = None
+        self._timeline_widget = None
 
     def clear(self):
         """Reset the app to a fresh state."""
+        # Drop any analysis still running or waiting to start
+        self._cancel_job()
+        if self._live_after is not None:
+            self.root.after_cancel(self._live_after)
+            self._live_after = None
+        self._shown_keys = None
+
         # Clear input
         self.input_text.delete("1.0", tk.END)
 
@@ -62,35 +123,127 @@ class EmotionApp:
         # Clear scores
         self.scores_label.config(text="")
 
-        # Clear charts
+        # Hide charts (they are kept for the next analysis)
         for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-        plt.close("all")
+            widget.pack_forget()
 
     def analyze(self):
+        """Start analyzing the input on a worker thread, superseding any running analysis."""
         raw = self.input_text.get("1.0", tk.END).strip()
         if not raw:
             return
 
-        # 1. Preprocess
-        stemmed, original_tokens, emoticons = preprocess(raw)
-
-        # 2. Score
-        result = score_text(stemmed, self.lexicon, emoticons)
-
-        # 3. Build display-friendly word results by pairing original tokens with scores
-        display_word_results = self._build_display_results(original_tokens, result["word_results"])
-
-        # 4. Display highlighted text
-        self.display_highlighted(display_word_results)
-
-        # 5. Update scores label
+        # same pipeline as live mode, so ticking Live never changes the result
+        live = self._live_analyzer()
+        self._shown_keys = None  # redraw every line
+        self._start_job(lambda cancel: live.analyze(raw, cancel), self._show_live_result)
+        self.scores_label.config(text="Analyzing...")
+        self.progress.pack(side=tk.LEFT, padx=5)
+        self.progress.start(10)
+
+    def _on_input_modified(self, event=None):
+        """Input changed (or live mode was toggled): schedule a debounced live update."""
+        if event is not None:
+            if not self.input_text.edit_modified():
+                return  # resetting the flag below fires <<Modified>> again
+            self.input_text.edit_modified(False)
+        if self._live_after is not None:
+            self.root.after_cancel(self._live_after)
+            self._live_after = None
+        if not self.live_var.get():
+            return
+        self._live_after = self.root.after(LIVE_DEBOUNCE_MS, self._live_update)
+
+    def _live_analyzer(self):
+        """The LiveAnalyzer for the current lexicon snapshot."""
+        lexicon = self.lexicons.snapshot.lexicon
+        if self.live.lexicon is not lexicon:
+            # the lexicon was reloaded: cached sentences and shown lines are stale
+            self.live = LiveAnalyzer(lexicon)
+            self._shown_keys = None
+        return self.live
+
+    def _live_update(self):
+        self._live_after = None
+        raw = self.input_text.get("1.0", tk.END)
+        live = self._live_analyzer()
+        self._start_job(lambda cancel: live.analyze(raw, cancel), self._show_live_result)
+
+    def _start_job(self, task, on_result):
+        """Run task on a worker thread; on_result gets its outcome on the main thread."""
+        self._cancel_job()
+        self._cancel = threading.Event()
+        self._on_result = on_result
+        self._running = True
+        worker = threading.Thread(
+            target=_analysis_worker,
+            args=(self._job, task, self._cancel, self._results),
+            daemon=True,
+        )
+        worker.start()
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_INTERVAL_MS, self._poll_results)
+
+    def _cancel_job(self):
+        """Tell the running worker (if any) to stop; bumping the job id makes any late result stale."""
+        self._cancel.set()
+        self._job += 1
+        self._stop_progress()
+
+    def _stop_progress(self):
+        self._running = False
+        self.progress.stop()
+        self.progress.pack_forget()
+
+    def _poll_results(self):
+        """Runs on the Tk main loop: hand the latest job's result to its callback once it arrives."""
+        try:
+            while True:
+                job, outcome = self._results.get_nowait()
+                if job == self._job:
+                    self._stop_progress()
+                    if isinstance(outcome, Exception):
+                        self.scores_label.config(text=f"Analysis failed: {outcome}")
+                    elif outcome is not None:
+                        self._on_result(outcome)
+        except queue.Empty:
+            pass
+
+        if self._running:
+            # still waiting on the current job
+            self.root.after(POLL_INTERVAL_MS, self._poll_results)
+        else:
+            self._polling = False
+
+    def _show_live_result(self, result):
+        """Show an analysis, rewriting only the output lines whose sentences changed."""
+        display_word_results = self._build_display_results(result["original_tokens"], result["word_results"])
+        if self._shown_keys is None:
+            self.display_highlighted(display_word_results)
+        else:
+            self.output_text.config(state=tk.NORMAL)
+            # bottom-up, so earlier line numbers stay valid
+            for _, i1, i2, j1, j2 in reversed(line_edits(self._shown_keys, result["keys"])):
+                self.output_text.delete(f"{i1 + 1}.0", f"{i2 + 1}.0")
+                for offset, sentence_words in enumerate(display_word_results[j1:j2]):
+                    self._insert_sentence(f"{i1 + 1 + offset}.0", sentence_words)
+            self.output_text.config(state=tk.DISABLED)
+        self._shown_keys = result["keys"]
+
+        if result["keys"]:
+            self._show_scores(result)
+        else:
+            self.scores_label.config(text="")
+
+    def _show_scores(self, result):
+        # Update scores label
         emotions = result["emotions"]
         dominant = result["dominant"]
         scores_str = " | ".join(f"{e}: {s}" for e, s in emotions.items())
         self.scores_label.config(text=f"Dominant: {dominant.upper()} ({emotions[dominant]})\n{scores_str}")
 
-        # 6. Render charts
+        # Render charts
         self.render_charts(emotions, result["per_sentence"])
 
     def _build_display_results(self, original_tokens, scored_word_results):
@@ -113,34 +266,39 @@ class EmotionApp:
         self.output_text.delete("1.0", tk.END)
 
         for sentence_words in word_results:
-            for word, emotions in sentence_words:
-                color = get_word_color(emotions)
-                if color:
-                    tag = f"color_{color}"
-                    self.output_text.tag_configure(tag, foreground=color)
-                    self.output_text.insert(tk.END, word + " ", tag)
-                else:
-                    self.output_text.insert(tk.END, word + " ")
-            self.output_text.insert(tk.END, "\n")
+            self._insert_sentence(tk.END, sentence_words)
 
         self.output_text.config(state=tk.DISABLED)
 
+    def _insert_sentence(self, index, sentence_words):
+        """Insert one sentence as a line of colored words at index (the widget must be editable)."""
+        chunks = []
+        for word, emotions in sentence_words:
+            color = get_word_color(emotions)
+            if color:
+                tag = f"color_{color}"
+                self.output_text.tag_configure(tag, foreground=color)
+                chunks += [word + " ", tag]
+            else:
+                chunks += [word + " ", ()]
+        chunks += ["\n", ()]
+        self.output_text.insert(index, *chunks)
+
     def render_charts(self, emotions, per_sentence):
-        """Embed radar chart and timeline into the Tkinter window."""
-        # Clear previous charts and close their figures to free memory
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-        plt.close("all")
+        """Show the radar chart and timeline, updating the embedded figures in place."""
+        if self.charts is None:
+            FigureCanvasTkAgg = _tk_canvas_class()
+            self.charts = EmotionCharts(blit=True)
+            self._radar_widget = FigureCanvasTkAgg(self.charts.radar_figure, self.chart_frame).get_tk_widget()
+            self._timeline_widget = FigureCanvasTkAgg(self.charts.timeline_figure, self.chart_frame).get_tk_widget()
+
+        has_timeline = self.charts.update(emotions, per_sentence)
 
         # Radar chart
-        radar_fig = plot_radar(emotions)
-        radar_canvas = FigureCanvasTkAgg(radar_fig, self.chart_frame)
-        radar_canvas.get_tk_widget().pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        radar_canvas.draw()
+        self._radar_widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
         # Timeline (only if multiple sentences)
-        timeline_fig = plot_timeline(per_sentence)
-        if timeline_fig:
-            timeline_canvas = FigureCanvasTkAgg(timeline_fig, self.chart_frame)
-            timeline_canvas.get_tk_widget().pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            timeline_canvas.draw()
+        if has_timeline:
+            self._timeline_widget.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        else:
+            self._timeline_widget.pack_forget()
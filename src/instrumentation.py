@@ -0,0 +1,159 @@
+"""Optional counters and stage timings for the scoring pipeline.
+
+Pass a PipelineStats as `stats=` to preprocess, score_text or score_sentence
+(or batch.score_document) and it accumulates, across calls:
+
+    timings   per stage: calls and total seconds
+    counts    documents, sentences, tokens, lexicon hits/misses, matched
+              phrases, emoticons, negation/intensifier tokens seen and how
+              many modified a scored word
+
+With stats=None (the default) the pipeline only pays for an `is None` check
+per stage and a few integer increments on rare branches.
+
+LatencyHistogram is a constant-memory, fixed-bucket histogram for request
+latencies (used by the scoring server's /metrics).
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+COUNTERS = [
+    "documents", "sentences", "tokens",
+    "lexicon_hits", "lexicon_misses", "phrases",
+    "negations", "negations_applied",
+    "intensifiers", "intensifiers_applied",
+    "emoticons", "emoticons_scored",
+]
+
+
+class PipelineStats:
+    """Thread-safe accumulator of stage timings and pipeline counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timings = {}  # stage -> [calls, total seconds]
+            self.counts = dict.fromkeys(COUNTERS, 0)
+
+    def add_time(self, stage, seconds, calls=1):
+        with self._lock:
+            entry = self.timings.setdefault(stage, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+
+    def add(self, **counts):
+        """Add to one or more counters, e.g. stats.add(documents=1, tokens=12)."""
+        with self._lock:
+            for name, n in counts.items():
+                self.counts[name] = self.counts.get(name, 0) + n
+
+    @contextmanager
+    def stage(self, name):
+        """Time the body of a with-block as one call of `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def merge(self, exported):
+        """Fold in another collector's to_dict() output (e.g. from a worker process)."""
+        for stage, entry in exported["timings"].items():
+            self.add_time(stage, entry["total_s"], entry["calls"])
+        self.add(**exported["counts"])
+
+    def to_dict(self):
+        """Export everything as plain JSON-serializable data, with derived rates."""
+        with self._lock:
+            timings = {
+                stage: {"calls": calls, "total_s": total, "mean_ms": round(total / calls * 1000, 4)}
+                for stage, (calls, total) in self.timings.items()
+            }
+            counts = dict(self.counts)
+        lookups = counts["lexicon_hits"] + counts["lexicon_misses"]
+        return {
+            "timings": timings,
+            "counts": counts,
+            "lexicon_hit_rate": round(counts["lexicon_hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+def timed(stats, stage, func, *args):
+    """Call func(*args), recording its duration under `stage` if stats is given."""
+    if stats is None:
+        return func(*args)
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        stats.add_time(stage, time.perf_counter() - started)
+
+
+# upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate percentiles.
+
+    observe() is O(number of buckets) and memory is constant, so it can sit on
+    every request. Percentiles report the upper bound of the bucket they fall in.
+    """
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = list(buckets_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.buckets_ms) + 1)  # the last bucket is +Inf
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def observe(self, seconds):
+        ms = seconds * 1000
+        i = 0
+        while i < len(self.buckets_ms) and ms > self.buckets_ms[i]:
+            i += 1
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Upper bound (ms) of the bucket holding the q-th percentile, or None if empty."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q / 100 * self.count
+            seen = 0
+            for bound, n in zip(self.buckets_ms + [float("inf")], self.counts):
+                seen += n
+                if seen >= rank:
+                    return bound if bound != float("inf") else round(self.max * 1000, 3)
+        return None
+
+    def to_dict(self):
+        with self._lock:
+            buckets = {f"le_{bound}ms": n for bound, n in zip(self.buckets_ms, self.counts)}
+            buckets["le_inf"] = self.counts[-1]
+            summary = {
+                "count": self.count,
+                "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+                "max_ms": round(self.max * 1000, 3),
+                "buckets": buckets,
+            }
+        for q in (50, 95, 99):
+            summary[f"p{q}_ms"] = self.percentile(q)
+        return summary
@@ -1,15 +1,26 @@
+import argparse
 import json
+import multiprocessing
 import os
+import time
 
-from nltk.corpus import wordnet
-from nltk.stem import PorterStemmer
-
-stemmer = PorterStemmer()
+from src.emotion_scorer import EMOTIONS
+from src.lexicon_format import binary_path_for, file_digest, write_binary_lexicon
+from src.preprocessor import preprocess, unfiltered_stems
 
 # Resolve paths relative to the project root (one level up from src/)
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SEED_PATH = os.path.join(PROJECT_ROOT, "data", "seed_words.json")
 LEXICON_PATH = os.path.join(PROJECT_ROOT, "data", "emotion_lexicon.json")
+# Build caches — safe to delete, they are recreated on the next build
+SYNONYM_CACHE_PATH = os.path.join(PROJECT_ROOT, "data", "synonym_cache.json")
+MANIFEST_PATH = os.path.join(PROJECT_ROOT, "data", "lexicon_manifest.json")
+
+SEED_SCORE = 0.9
+SYNONYM_SCORE = 0.6
+# bump when lexicon_key (or which words get keys) changes, so --incremental
+# doesn't reuse keys made the old way
+KEY_FORMAT = 4
 
 
 def load_seed_words(path=SEED_PATH):
@@ -17,10 +28,70 @@ def load_seed_words(path=SEED_PATH):
         return json.load(f)
 
 
+def _load_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _save_json(data, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_synonym_cache(path=SYNONYM_CACHE_PATH):
+    """Load the on-disk WordNet expansion cache ({"max_synsets:word": [synonyms]})."""
+    return _load_json(path, {})
+
+
+def save_synonym_cache(cache, path=SYNONYM_CACHE_PATH):
+    _save_json(cache, path)
+
+
+def source_words(seed_path=SEED_PATH, synonym_cache_path=SYNONYM_CACHE_PATH):
+    """Return the unstemmed words the lexicon was built from, for pre-warming the stem cache.
+
+    Lexicon keys are already stems ("happi"); documents reach the stemmer with
+    the surface words ("happy"). These are every seed word plus the WordNet
+    synonyms in the build's synonym cache, with multi-word expressions split
+    into their words.
+    """
+    texts = [word for seeds in _load_json(seed_path, {}).values() for word in seeds]
+    for synonyms in load_synonym_cache(synonym_cache_path).values():
+        texts.extend(synonyms)
+    return {word for text in texts for word in text.lower().split()}
+
+
+def _wordnet():
+    # WordNet is large; only load it when a seed word actually needs expanding
+    from nltk.corpus import wordnet
+    return wordnet
+
+
+def lexicon_key(text):
+    """Return the lexicon key for a seed word or synonym, or None if it can't be matched.
+
+    A single word is preprocessed like document text, so it becomes its stem, and
+    a stop word can't be matched at all. A multi-word seed becomes a phrase key:
+    the stems of all its words, stop words included, joined by spaces ("scared to
+    death" -> "scare to death"), which is how the preprocessor matches phrases.
+    """
+    tokens = unfiltered_stems(text)
+    if len(tokens) > 1 and len(text.split()) > 1:
+        return " ".join(tokens)
+    stemmed, _, _ = preprocess(text, mode="fast")
+    tokens = [token for sentence in stemmed for token in sentence]
+    return " ".join(tokens) if tokens else None
+
+
 def get_synonyms(word, max_synsets=3):
     """Pull synonyms from WordNet, limited to the first few synsets to reduce noise."""
     synonyms = set()
-    for synset in wordnet.synsets(word)[:max_synsets]:
+    for synset in _wordnet().synsets(word)[:max_synsets]:
         for lemma in synset.lemmas():
             clean = lemma.name().replace("_", " ").lower()
             if clean != word:
@@ -28,33 +99,118 @@ def get_synonyms(word, max_synsets=3):
     return synonyms
 
 
-def build_lexicon(seed_words):
-    """Build an emotion lexicon with stemmed keys.
+def _synonyms_task(args):
+    word, max_synsets = args
+    return word, sorted(get_synonyms(word, max_synsets))
 
-    Seed words get intensity 0.9, synonyms get 0.6.
-    Words appearing under multiple emotions keep all mappings (mixed emotions).
-    All keys are stemmed so lookups match the preprocessor output.
+
+def expand_synonyms(words, max_synsets=3, workers=1, cache=None, stats=None):
+    """Return {word: sorted synonyms}, looking words up in WordNet only on a cache miss.
+
+    Misses are spread over a process pool when workers > 1. `cache` is updated in
+    place; `stats`, if given, gets cache_hits / cache_misses counts added to it.
     """
-    lexicon = {}
+    cache = {} if cache is None else cache
+    expanded = {}
+    missing = []
+    for word in dict.fromkeys(words):
+        key = f"{max_synsets}:{word}"
+        if key in cache:
+            expanded[word] = cache[key]
+        else:
+            missing.append(word)
+
+    tasks = [(word, max_synsets) for word in missing]
+    if workers > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(workers) as pool:
+            found = pool.map(_synonyms_task, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+    else:
+        found = map(_synonyms_task, tasks)
+    for word, synonyms in found:
+        cache[f"{max_synsets}:{word}"] = expanded[word] = synonyms
+
+    if stats is not None:
+        stats["cache_hits"] = stats.get("cache_hits", 0) + len(expanded) - len(missing)
+        stats["cache_misses"] = stats.get("cache_misses", 0) + len(missing)
+    return expanded
 
+
+def build_contributions(seed_words, max_synsets=3, workers=1, cache=None, previous=None, stats=None):
+    """Work out which stemmed lexicon keys each seed word contributes.
+
+    Returns {emotion: {word: [seed_key, [synonym_keys]]}}, keys as made by
+    lexicon_key (seed_key is None if the seed can't be matched). Entries found in
+    `previous` (the contributions of the last build with the same max_synsets)
+    are reused, so only added or changed seed words are expanded and stemmed.
+    """
+    previous = previous or {}
+    contributions = {}
+    to_expand = []
+    for emotion, seeds in seed_words.items():
+        known = previous.get(emotion, {})
+        contributions[emotion] = {word: known[word] for word in seeds if word in known}
+        to_expand.extend(word for word in seeds if word not in known)
+
+    expanded = expand_synonyms(to_expand, max_synsets, workers, cache, stats)
     for emotion, seeds in seed_words.items():
         for word in seeds:
-            stemmed = stemmer.stem(word)
-            # seed word — high confidence
-            lexicon.setdefault(stemmed, {})[emotion] = 0.9
+            if word not in contributions[emotion]:
+                # multi-word WordNet lemmas are mostly phrasal verbs ("get to",
+                # "pick up") that would fire on everyday text; only seeds make phrases
+                synonyms = [s for s in expanded[word] if " " not in s]
+                synonym_keys = {lexicon_key(s) for s in synonyms} - {None}
+                contributions[emotion][word] = [lexicon_key(word), sorted(synonym_keys)]
+
+    if stats is not None:
+        stats["seeds_reused"] = sum(len(words) for words in contributions.values()) - len(to_expand)
+        stats["seeds_expanded"] = len(to_expand)
+    return contributions
+
 
-            # expand with synonyms — moderate confidence
-            for synonym in get_synonyms(word):
-                stemmed_syn = stemmer.stem(synonym)
-                lexicon.setdefault(stemmed_syn, {}).setdefault(emotion, 0.6)
+def compose_lexicon(contributions):
+    """Merge per-word contributions into a {stem: {emotion: score}} lexicon.
 
+    Seed words get SEED_SCORE and synonyms SYNONYM_SCORE; a seed always wins over
+    a synonym for the same emotion. Words under multiple emotions keep all mappings.
+    """
+    lexicon = {}
+    for emotion, words in contributions.items():
+        for seed_key, _ in words.values():
+            if seed_key is not None:
+                lexicon.setdefault(seed_key, {})[emotion] = SEED_SCORE
+    for emotion, words in contributions.items():
+        for _, synonym_keys in words.values():
+            for key in synonym_keys:
+                lexicon.setdefault(key, {}).setdefault(emotion, SYNONYM_SCORE)
     return lexicon
 
 
-def save_lexicon(lexicon, path=LEXICON_PATH):
-    with open(path, "w") as f:
+def build_lexicon(seed_words, max_synsets=3, workers=1, cache=None):
+    """Build an emotion lexicon with stemmed keys.
+
+    Seed words get intensity 0.9, synonyms get 0.6.
+    Words appearing under multiple emotions keep all mappings (mixed emotions).
+    All keys are stemmed so lookups match the preprocessor output; multi-word
+    seeds become phrase keys (see lexicon_key), multi-word synonyms are skipped.
+    """
+    return compose_lexicon(build_contributions(seed_words, max_synsets, workers, cache))
+
+
+def save_lexicon(lexicon, path=LEXICON_PATH, binary=True):
+    """Save the lexicon as JSON and, by default, its memory-mappable binary companion.
+
+    The JSON is written to a temporary file and renamed into place, so a running
+    LexiconManager never sees it half-written.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
         json.dump(lexicon, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
     print(f"Lexicon saved to {path}")
+    if binary:
+        bin_path = binary_path_for(path)
+        write_binary_lexicon(lexicon, bin_path, EMOTIONS, file_digest(path))
+        print(f"Binary lexicon saved to {bin_path}")
     print(f"  Total entries: {len(lexicon)}")
     emotions_count = {}
     for emotions in lexicon.values():
@@ -64,10 +220,53 @@ def save_lexicon(lexicon, path=LEXICON_PATH):
         print(f"  {emotion}: {count} words")
 
 
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.lexicon_builder",
+                                     description="Build the emotion lexicon from the seed words.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes for WordNet expansion; 0 means one per CPU (default: 1)")
+    parser.add_argument("--max-synsets", type=int, default=3, help="synsets used per seed word")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-expand seed words added or changed since the last build")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the on-disk synonym cache")
+    args = parser.parse_args(argv)
+
+    stats = {}
+    started = time.perf_counter()
     seeds = load_seed_words()
-    lexicon = build_lexicon(seeds)
+    cache = {} if args.no_cache else load_synonym_cache()
+
+    previous = None
+    if args.incremental:
+        manifest = _load_json(MANIFEST_PATH, {})
+        if manifest.get("max_synsets") == args.max_synsets and manifest.get("key_format") == KEY_FORMAT:
+            previous = manifest.get("contributions")
+
+    t0 = time.perf_counter()
+    contributions = build_contributions(seeds, args.max_synsets, args.workers or os.cpu_count(),
+                                        cache, previous, stats)
+    t1 = time.perf_counter()
+    lexicon = compose_lexicon(contributions)
+    t2 = time.perf_counter()
+
     save_lexicon(lexicon)
+    if not args.no_cache:
+        save_synonym_cache(cache)
+    _save_json({"max_synsets": args.max_synsets, "key_format": KEY_FORMAT, "contributions": contributions},
+               MANIFEST_PATH)
+    finished = time.perf_counter()
+
+    print("\n--- Build Stats ---")
+    print(f"  Seeds expanded: {stats['seeds_expanded']}  reused: {stats['seeds_reused']}")
+    print(f"  Synonym cache:  {stats['cache_hits']} hits, {stats['cache_misses']} misses")
+    print(f"  Expand:  {t1 - t0:.3f}s")
+    print(f"  Compose: {t2 - t1:.3f}s")
+    print(f"  Total:   {finished - started:.3f}s")
+    return lexicon
+
+
+if __name__ == "__main__":
+    lexicon = main()
 
     # quick spot-check
     print("\n--- Spot Check ---")
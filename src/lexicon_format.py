@@ -0,0 +1,191 @@
+"""Compact binary lexicon format, opened lazily with mmap.
+
+Layout (little-endian):
+    header        magic, format version, emotion count, entry count,
+                  hash-table size and the SHA-1 of the JSON lexicon it was built from
+    emotions      emotion names, 16 bytes each, in score-column order
+    offsets       uint32 × (entries + 1) into the string table
+    hash index    uint32 × table size, open addressing on crc32 of the key
+    strings       UTF-8 keys, sorted, concatenated
+    scores        float32 × entries × emotions
+
+Nothing is parsed up front, so opening is near-constant time however large the
+lexicon is, and processes that map the same file share its pages.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Mapping
+
+import numpy as np
+
+MAGIC = b"EMLX"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHHII20s")
+_NAME_SIZE = 16
+_EMPTY = 0xFFFFFFFF
+
+
+def binary_path_for(json_path):
+    """Return where the binary companion of a JSON lexicon lives."""
+    return os.path.splitext(json_path)[0] + ".bin"
+
+
+def file_digest(path):
+    """SHA-1 of a file's bytes, used to tie a binary lexicon to its JSON source."""
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+def _table_size(n_entries):
+    size = 8
+    while size < n_entries * 2:
+        size *= 2
+    return size
+
+
+def write_binary_lexicon(lexicon, path, emotions, source_digest=b"\0" * 20):
+    """Write a {stem: {emotion: score}} lexicon in the binary format.
+
+    The file is written to a temporary name and renamed into place, so readers
+    never see a half-written lexicon.
+    """
+    keys = sorted(lexicon, key=lambda k: k.encode("utf-8"))
+    encoded = [k.encode("utf-8") for k in keys]
+    emotion_index = {e: i for i, e in enumerate(emotions)}
+
+    offsets = np.zeros(len(keys) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    table_size = _table_size(len(keys))
+    table = np.full(table_size, _EMPTY, dtype="<u4")
+    for i, key in enumerate(encoded):
+        slot = zlib.crc32(key) & (table_size - 1)
+        while table[slot] != _EMPTY:
+            slot = (slot + 1) & (table_size - 1)
+        table[slot] = i
+
+    scores = np.zeros((len(keys), len(emotions)), dtype="<f4")
+    for i, key in enumerate(keys):
+        for emotion, score in lexicon[key].items():
+            scores[i, emotion_index[emotion]] = score
+
+    strings = b"".join(encoded)
+    padding = b"\0" * (-len(strings) % 4)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(emotions), len(keys), table_size, source_digest))
+        for emotion in emotions:
+            f.write(emotion.encode("ascii").ljust(_NAME_SIZE, b"\0"))
+        f.write(offsets.tobytes())
+        f.write(table.tobytes())
+        f.write(strings + padding)
+        f.write(scores.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    """Return (version, source_digest) of a binary lexicon, or None if it is missing or not one."""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(raw) < _HEADER.size:
+        return None
+    magic, version, _, _, _, digest = _HEADER.unpack(raw)
+    if magic != MAGIC:
+        return None
+    return version, digest
+
+
+def load_binary_lexicon(json_path, emotions):
+    """Open the binary companion of a JSON lexicon, rebuilding it first if it is missing or stale."""
+    bin_path = binary_path_for(json_path)
+    digest = file_digest(json_path)
+    if read_header(bin_path) != (FORMAT_VERSION, digest):
+        with open(json_path) as f:
+            lexicon = json.load(f)
+        write_binary_lexicon(lexicon, bin_path, emotions, digest)
+    return MappedLexicon(bin_path)
+
+
+class MappedLexicon(Mapping):
+    """Read-only, dict-like view of a binary lexicon backed by mmap.
+
+    Lookups hash the key into the on-disk index and build the small
+    {emotion: score} dict on demand, so it can be passed anywhere a dict
+    lexicon is used.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_emotions, n_entries, table_size, digest = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} binary lexicon")
+        self.source_digest = digest
+        self._size = n_entries
+        self._mask = table_size - 1
+
+        pos = _HEADER.size
+        self.emotions = [
+            self._mm[pos + i * _NAME_SIZE:pos + (i + 1) * _NAME_SIZE].rstrip(b"\0").decode("ascii")
+            for i in range(n_emotions)
+        ]
+        pos += n_emotions * _NAME_SIZE
+        self._offsets = np.frombuffer(self._mm, dtype="<u4", count=n_entries + 1, offset=pos)
+        pos += self._offsets.nbytes
+        self._table = np.frombuffer(self._mm, dtype="<u4", count=table_size, offset=pos)
+        pos += self._table.nbytes
+        self._strings = pos
+        pos += int(self._offsets[-1])
+        pos += -pos % 4
+        self.scores = np.frombuffer(self._mm, dtype="<f4", count=n_entries * n_emotions,
+                                    offset=pos).reshape(n_entries, n_emotions)
+
+    def _key_at(self, i):
+        start = self._strings + int(self._offsets[i])
+        return self._mm[start:self._strings + int(self._offsets[i + 1])]
+
+    def _index(self, key):
+        encoded = key.encode("utf-8")
+        slot = zlib.crc32(encoded) & self._mask
+        while True:
+            i = int(self._table[slot])
+            if i == _EMPTY:
+                return -1
+            if self._key_at(i) == encoded:
+                return i
+            slot = (slot + 1) & self._mask
+
+    def _entry(self, i):
+        # float32 storage; the source scores are short decimals, so round back to them
+        return {e: round(s, 6) for e, s in zip(self.emotions, self.scores[i].tolist()) if s}
+
+    def get(self, key, default=None):
+        i = self._index(key)
+        return default if i < 0 else self._entry(i)
+
+    def __getitem__(self, key):
+        i = self._index(key)
+        if i < 0:
+            raise KeyError(key)
+        return self._entry(i)
+
+    def __contains__(self, key):
+        return self._index(key) >= 0
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self._key_at(i).decode("utf-8")
+
+    def __len__(self):
+        return self._size
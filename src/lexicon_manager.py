@@ -0,0 +1,191 @@
+"""Hot reloading of the emotion lexicon for long-running processes.
+
+LexiconManager holds the current lexicon as an immutable snapshot. A
+background thread polls the lexicon file; when its mtime or size changes and
+its SHA-1 differs from the loaded one, the new lexicon is loaded (and its
+phrase trie built) on that thread. The new snapshot then replaces the old one
+in a single reference assignment. Readers take `manager.snapshot` once and use
+it for a whole call, so scoring already in progress finishes on the lexicon it
+started with. A file that is missing, half-written or invalid is ignored until
+a later poll loads it successfully.
+
+Only the lexicon file is reloaded. EMOJI_MAP, the negation and intensifier
+tables and EMOTION_FLIP are code constants in src.emotion_scorer, so changing
+them still needs a restart.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from src.emotion_scorer import EMOTIONS, LEXICON_PATH, load_lexicon, score_text, warm_lexicon_stems
+from src.phrases import phrase_trie
+from src.preprocessor import preprocess
+
+RELOAD_INTERVAL = 2.0
+
+
+class LexiconSnapshot:
+    """One loaded lexicon and the version (short SHA-1 of its JSON file) it came from."""
+
+    __slots__ = ("lexicon", "version", "loaded_at")
+
+    def __init__(self, lexicon, version, loaded_at):
+        self.lexicon = lexicon
+        self.version = version
+        self.loaded_at = loaded_at
+
+
+def _check_emotions(lexicon):
+    unknown = {emotion for scores in lexicon.values() for emotion in scores} - set(EMOTIONS)
+    if unknown:
+        raise ValueError(f"lexicon has unknown emotions: {sorted(unknown)}")
+
+
+class LexiconManager:
+    """Keeps a lexicon current with its file, swapping in new versions atomically.
+
+    Args:
+        path: the JSON lexicon to watch
+        binary: load through the memory-mapped binary companion (rebuilt when stale)
+        warm_stems: pre-warm the stem cache with the lexicon's source words on each load
+        interval: seconds between polls once start() has been called
+        on_reload: optional callback, called with the new snapshot on the
+                   polling thread after each swap
+    """
+
+    def __init__(self, path=LEXICON_PATH, binary=False, warm_stems=False, interval=RELOAD_INTERVAL,
+                 on_reload=None):
+        self.path = path
+        self.binary = binary
+        self.warm_stems = warm_stems
+        self.interval = interval
+        self.on_reload = on_reload
+        self.reloads = 0
+        self.last_error = None
+        self._file_stat = self._stat()
+        self.snapshot = self._load()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        if self.binary:
+            lexicon = load_lexicon(self.path, self.warm_stems, binary=True)
+            version = lexicon.source_digest.hex()
+        else:
+            # hash and parse the same bytes, so the version always matches the contents
+            with open(self.path, "rb") as f:
+                data = f.read()
+            version = hashlib.sha1(data).hexdigest()
+            lexicon = json.loads(data)
+            if not isinstance(lexicon, dict):
+                raise ValueError(f"{self.path} does not hold a lexicon object")
+            if self.warm_stems:
+                warm_lexicon_stems()
+        _check_emotions(lexicon)
+        phrase_trie(lexicon)  # build it here rather than in the first scoring call
+        return LexiconSnapshot(lexicon, version[:12], time.time())
+
+    def check(self):
+        """Reload the lexicon if its file changed. Returns True if a new snapshot was swapped in."""
+        try:
+            file_stat = self._stat()
+            if file_stat == self._file_stat:
+                return False
+            snapshot = self._load()
+        except (OSError, ValueError) as e:
+            # most likely caught mid-write; the next poll tries again
+            self.last_error = e
+            return False
+        self._file_stat = file_stat
+        self.last_error = None
+        if snapshot.version == self.snapshot.version:
+            return False  # touched, not changed
+        self.snapshot = snapshot
+        self.reloads += 1
+        if self.on_reload is not None:
+            self.on_reload(snapshot)
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """Start polling on a daemon thread. Returns self."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="lexicon-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def score(self, text, mode="accurate", stats=None, output="full"):
+        """Preprocess and score raw text against one snapshot, tagged with its "lexicon_version".
+
+        The snapshot is taken once, so the phrases folded by preprocess and the
+        lexicon the tokens are scored against always come from the same version.
+        """
+        snapshot = self.snapshot
+        stemmed, _, emoticons = preprocess(text, mode, stats, phrase_trie(snapshot.lexicon))
+        result = score_text(stemmed, snapshot.lexicon, emoticons, stats, output)
+        result["lexicon_version"] = snapshot.version
+        return result
+
+    def score_text(self, stemmed_sentences, emoticons=None, stats=None, output="full"):
+        """score_text against the current snapshot, tagged with its "lexicon_version".
+
+        For tokens preprocessed by the caller. If they were preprocessed with an
+        earlier snapshot's phrase trie, a reload in between mixes two versions;
+        use score() for raw text.
+        """
+        snapshot = self.snapshot
+        result = score_text(stemmed_sentences, snapshot.lexicon, emoticons, stats, output)
+        result["lexicon_version"] = snapshot.version
+        return result
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lexicon.json")
+        shutil.copy(LEXICON_PATH, path)
+        text = "What a glorious, sunny morning!"
+
+        def report(snapshot):
+            print(f"  reloaded -> {snapshot.version}")
+
+        with LexiconManager(path, interval=0.1, on_reload=report) as manager:
+            before = manager.score(text)
+            print(f"Before: {before['dominant']} {before['emotions']} (lexicon {before['lexicon_version']})")
+
+            with open(path) as f:
+                lexicon = json.load(f)
+            lexicon["gloriou"] = {"joy": 0.9}
+            lexicon["sunni"] = {"joy": 0.6}
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(lexicon, f)
+            os.replace(tmp_path, path)
+            time.sleep(0.5)
+
+            after = manager.score(text)
+            print(f"After:  {after['dominant']} {after['emotions']} (lexicon {after['lexicon_version']})")
@@ -0,0 +1,135 @@
+"""Incremental re-scoring for live (as-you-type) analysis.
+
+The input is split into sentences with the preprocessor's rule
+(preprocessor.split_sentences), and each sentence's preprocessing and
+score_sentence output is cached under a hash of its content,
+so an edit only re-scores the sentences it touched. Document totals are then
+recombined from the cached per-sentence results. Nothing here depends on Tk.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+from src.emotion_scorer import EMOTIONS, normalize_emotions, score_emoticons, score_sentence
+from src.phrases import phrase_trie
+from src.preprocessor import preprocess, split_sentences
+
+
+def sentence_key(sentence):
+    """Content hash a sentence's cached result is stored under."""
+    return hashlib.blake2b(sentence.encode("utf-8"), digest_size=16).digest()
+
+
+def line_edits(old_keys, new_keys):
+    """Return difflib opcodes (tag, i1, i2, j1, j2) turning old_keys into new_keys, minus the 'equal' runs."""
+    matcher = SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+    return [op for op in matcher.get_opcodes() if op[0] != "equal"]
+
+
+class LiveAnalyzer:
+    """Scores a document that changes a little at a time.
+
+    analyze() returns the same fields as score_text, with the same values,
+    plus the unstemmed tokens for display, the sentence keys (for line_edits,
+    one per per_sentence entry) and how many sentences had to be re-scored.
+    A sentence that cleaning leaves empty (e.g. only emoticons) counts towards
+    the totals but has no per_sentence entry, as in score_text. The cache keeps
+    the max_cached most recently used sentences.
+    """
+
+    def __init__(self, lexicon, mode="fast", max_cached=4096):
+        self.lexicon = lexicon
+        self.phrases = phrase_trie(lexicon)
+        self.mode = mode
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        # a superseded GUI job may still be running when the next one starts
+        self._lock = threading.Lock()
+
+    def _score(self, key, sentence):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                return entry, False
+
+        stemmed, original, emoticons = preprocess(sentence, self.mode, phrases=self.phrases)
+        # one scored sentence, or none if cleaning left nothing
+        scored = [score_sentence(tokens, self.lexicon) + (words,) for tokens, words in zip(stemmed, original)]
+        entry = (scored, emoticons)
+
+        with self._lock:
+            self._cache[key] = entry
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return entry, True
+
+    def analyze(self, text, cancel=None):
+        """Score text, re-scoring only sentences not already in the cache.
+
+        cancel is an optional threading.Event, checked between sentences; once
+        it is set, analyze stops and returns None. Sentences scored so far stay
+        cached for the next call.
+        """
+        all_emotions = {e: 0 for e in EMOTIONS}
+        sentence_scores, all_word_results, original_tokens, keys, emoticons = [], [], [], [], []
+        rescored = 0
+
+        for sentence in split_sentences(text):
+            if cancel is not None and cancel.is_set():
+                return None
+            key = sentence_key(sentence)
+            (scored, found), missed = self._score(key, sentence)
+            rescored += missed
+            emoticons.extend(found)
+            for sentence_emotions, word_results, original in scored:
+                keys.append(key)
+                sentence_scores.append(sentence_emotions)
+                all_word_results.append(word_results)
+                original_tokens.append(original)
+                for emotion, score in sentence_emotions.items():
+                    all_emotions[emotion] += score
+
+        for emotion, score in score_emoticons(emoticons).items():
+            all_emotions[emotion] += score
+        normalized, dominant = normalize_emotions(all_emotions)
+
+        return {
+            "emotions": normalized,
+            "dominant": dominant,
+            "per_sentence": sentence_scores,
+            "word_results": all_word_results,
+            "original_tokens": original_tokens,
+            "keys": keys,
+            "rescored": rescored,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+if __name__ == "__main__":
+    import time
+
+    from src.emotion_scorer import load_lexicon
+
+    live = LiveAnalyzer(load_lexicon())
+    templates = [
+        "I was thrilled when I got offer #{}.",
+        "But I'm terrified about moving to city #{}.",
+        "My friends are very sad to see me go :( #{}.",
+    ]
+    doc = " ".join(t.format(i) for i in range(200) for t in templates)
+
+    for label, text in [("first pass", doc), ("unchanged", doc), ("one edit", doc + " What a lovely day!")]:
+        t0 = time.perf_counter()
+        result = live.analyze(text)
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"{label:>10}: {len(result['keys'])} sentences, {result['rescored']} re-scored, "
+              f"{elapsed:.1f} ms, dominant={result['dominant']}")
+
+    before = live.analyze("Happy start. Sad middle. Angry end.")["keys"]
+    after = live.analyze("Happy start. Calm middle. Angry end. New line.")["keys"]
+    print(f"Line edits: {line_edits(before, after)}")
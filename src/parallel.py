@@ -0,0 +1,169 @@
+"""Multi-process corpus scoring.
+
+Documents are sent to a process pool in chunks. Each worker loads the lexicon
+and the NLTK stopwords/punkt data once, in its initializer, and reuses them
+for every chunk it is given. Only a bounded number of chunks are in flight at
+a time, so the input can be an arbitrarily long iterator.
+"""
+import multiprocessing
+import os
+import queue
+from collections import deque
+
+from src.batch import score_document
+from src.emotion_scorer import LEXICON_PATH, load_lexicon
+from src.instrumentation import PipelineStats
+from src.pooling import chunked, max_pending, ordered_map
+from src.preprocessor import preprocess
+
+# per-worker state, set once by _init_worker
+_worker_lexicon = None
+_worker_per_sentence = False
+_worker_mode = "accurate"
+_worker_stats = None
+_worker_lexicons = None  # a LexiconManager when hot reloading
+
+
+def _init_worker(lexicon_path, per_sentence, warm_stems, mode, binary, collect_stats=False, reload_interval=0):
+    """Load the lexicon and warm up NLTK once per worker process.
+
+    With reload_interval > 0 the worker watches the lexicon file instead and
+    tags each result with the "lexicon_version" it was scored with.
+    """
+    global _worker_lexicon, _worker_per_sentence, _worker_mode, _worker_stats, _worker_lexicons
+    if reload_interval:
+        from src.lexicon_manager import LexiconManager
+        _worker_lexicons = LexiconManager(lexicon_path, binary, warm_stems, reload_interval).start()
+    else:
+        _worker_lexicon = load_lexicon(lexicon_path, warm_stems, binary)
+    _worker_per_sentence = per_sentence
+    _worker_mode = mode
+    _worker_stats = PipelineStats() if collect_stats else None
+    # NLTK loads lazily; this pulls in the stopwords, punkt and the stemmer now
+    preprocess("Warm up. Ready.")
+
+
+def _score_chunk(chunk):
+    """Score a list of (record_id, text) pairs inside a worker.
+
+    Returns (results, stats) where stats is the chunk's exported counters, or None.
+    """
+    lexicon, version = _worker_lexicon, None
+    if _worker_lexicons is not None:
+        # one snapshot per chunk, so a reload never splits a chunk between lexicons
+        snapshot = _worker_lexicons.snapshot
+        lexicon, version = snapshot.lexicon, snapshot.version
+    results = []
+    for record_id, text in chunk:
+        result = {"id": record_id}
+        result.update(score_document(text, lexicon, _worker_per_sentence, _worker_mode, _worker_stats))
+        if version is not None:
+            result["lexicon_version"] = version
+        results.append(result)
+    if _worker_stats is None:
+        return results, None
+    exported = _worker_stats.to_dict()
+    _worker_stats.reset()
+    return results, exported
+
+
+def score_parallel(records, processes=None, chunksize=64, ordered=True,
+                   lexicon_path=LEXICON_PATH, per_sentence=False, warm_stems=False,
+                   mode="accurate", binary=False, stats=None, dedup=None):
+    """Score (record_id, text) pairs across a process pool, yielding result dicts.
+
+    Args:
+        records: iterable of (record_id, text) pairs, e.g. from batch.read_records
+        processes: number of worker processes (default: one per CPU)
+        chunksize: documents per task sent to a worker
+        ordered: yield results in input order; False yields each chunk as soon
+                 as it finishes, for maximum throughput
+        lexicon_path: lexicon each worker loads at startup
+        per_sentence: include raw per-sentence scores in each result
+        warm_stems: pre-warm each worker's stem cache with the lexicon's source words
+        mode: preprocessing mode, "accurate" or "fast"
+        binary: have workers memory-map the binary lexicon, sharing its pages
+        stats: optional instrumentation.PipelineStats; every worker's counters
+               and stage timings are merged into it as chunks come back
+        dedup: optional dedup.Deduplicator; each distinct text is sent to the
+               pool once and its result copied to the near-duplicates (always
+               in input order)
+    """
+    processes = processes or os.cpu_count() or 1
+    if binary:
+        # rebuild a stale binary once here rather than racing in every worker
+        load_lexicon(lexicon_path, binary=True)
+    limit = max_pending(processes)
+
+    init_args = (lexicon_path, per_sentence, warm_stems, mode, binary, stats is not None)
+    with multiprocessing.Pool(processes, _init_worker, init_args) as pool:
+        if dedup is not None:
+            yield from _score_deduplicated(pool, records, chunksize, limit, dedup, stats)
+        elif ordered:
+            for chunk_result in ordered_map(pool, _score_chunk, chunked(records, chunksize), limit):
+                yield from _unpack(chunk_result, stats)
+        else:
+            done = queue.Queue()
+            in_flight = 0
+            for chunk in chunked(records, chunksize):
+                pool.apply_async(_score_chunk, (chunk,), callback=done.put, error_callback=done.put)
+                in_flight += 1
+                if in_flight >= limit:
+                    yield from _take(done, stats)
+                    in_flight -= 1
+            while in_flight:
+                yield from _take(done, stats)
+                in_flight -= 1
+
+
+def _score_deduplicated(pool, records, chunksize, limit, dedup, stats):
+    """Ordered scoring that sends only texts with an unseen fingerprint to the pool.
+
+    The deduplicator maps each fingerprint to a one-item list that is filled
+    when its text comes back, so a row can refer to a result still in flight.
+    """
+    pending = deque()  # (rows, slots sent to the pool, task or None) per input chunk
+    for chunk in chunked(records, chunksize):
+        rows, sent, texts = [], [], []
+        for record_id, text in chunk:
+            key = dedup.key(text)
+            slot = dedup.lookup(key)
+            if slot is None:
+                slot = [None]
+                dedup.store(key, slot)
+                texts.append((len(sent), text))
+                sent.append(slot)
+            rows.append((record_id, slot))
+        task = pool.apply_async(_score_chunk, (texts,)) if texts else None
+        pending.append((rows, sent, task))
+        if len(pending) >= limit:
+            yield from _fan_out(*pending.popleft(), stats)
+    while pending:
+        yield from _fan_out(*pending.popleft(), stats)
+
+
+def _fan_out(rows, sent, task, stats):
+    """Fill in a chunk's newly scored slots, then yield a result for each of its rows."""
+    if task is not None:
+        for result in _unpack(task.get(), stats):
+            sent[result.pop("id")][0] = result
+    for record_id, slot in rows:
+        result = {"id": record_id}
+        result.update(slot[0])
+        yield result
+
+
+def _unpack(chunk_result, stats):
+    """Merge a finished chunk's worker stats (if collected) and return its results."""
+    results, exported = chunk_result
+    if stats is not None and exported is not None:
+        stats.merge(exported)
+    return results
+
+
+def _take(done, stats=None):
+    """Block for the next finished chunk, re-raising a worker's exception."""
+    chunk_result = done.get()
+    if isinstance(chunk_result, BaseException):
+        raise chunk_result
+    return _unpack(chunk_result, stats)
@@ -0,0 +1,85 @@
+"""Multi-word expressions in the lexicon.
+
+A phrase entry is a lexicon key made of two or more stemmed tokens joined by
+single spaces ("scare to death", "over the moon"). Stop words are kept in the key: the
+preprocessor matches phrases against each sentence's stems before it removes
+stop words, and hands each match on as a single token. Phrase keys are loaded
+into a token trie, and find_phrases walks a sentence once. From each position it
+follows the trie only as far as the tokens keep matching, so the cost per token
+depends on the longest phrase, not on how many phrases there are.
+"""
+import threading
+from collections import OrderedDict
+
+_END = ""  # end-of-phrase marker; never a token, so it can't clash with a child
+
+# tries for the last few lexicon objects scored against, keyed by id()
+_TRIE_CACHE_SIZE = 8
+_tries = OrderedDict()
+_tries_lock = threading.Lock()
+
+
+def is_phrase(key):
+    return " " in key
+
+
+def build_phrase_trie(keys):
+    """Build a {token: child} trie from phrase keys; each final node maps _END to its key."""
+    trie = {}
+    for key in keys:
+        node = trie
+        for token in key.split(" "):
+            node = node.setdefault(token, {})
+        node[_END] = key
+    return trie
+
+
+def phrase_trie(lexicon):
+    """Return the phrase trie for a lexicon, building it on first use.
+
+    Tries are remembered per lexicon object. A lexicon edited in place after it
+    has been scored against needs clear_phrase_tries().
+    """
+    with _tries_lock:
+        entry = _tries.get(id(lexicon))
+        if entry is not None and entry[0] is lexicon:
+            _tries.move_to_end(id(lexicon))
+            return entry[1]
+    trie = build_phrase_trie(key for key in lexicon if is_phrase(key))
+    with _tries_lock:
+        # the lexicon is kept alive with its trie, so its id can't be reused meanwhile
+        _tries[id(lexicon)] = (lexicon, trie)
+        while len(_tries) > _TRIE_CACHE_SIZE:
+            _tries.popitem(last=False)
+    return trie
+
+
+def clear_phrase_tries():
+    with _tries_lock:
+        _tries.clear()
+
+
+def find_phrases(tokens, trie):
+    """Return (start, end, key) for each phrase in tokens, in order.
+
+    Matches do not overlap. Where two phrases could match at the same place, the
+    one that starts earliest wins, and after that the longest.
+    """
+    matches = []
+    n = len(tokens)
+    i = 0
+    while i < n:
+        node = trie.get(tokens[i])
+        match = None
+        j = i + 1
+        while node is not None:
+            if _END in node:
+                match = (i, j, node[_END])
+            node = node.get(tokens[j]) if j < n else None
+            j += 1
+        if match is None:
+            i += 1
+        else:
+            matches.append(match)
+            i = match[1]
+    return matches
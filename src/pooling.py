@@ -0,0 +1,35 @@
+"""Chunking and bounded task submission shared by the process-pool front ends
+(src.parallel for scoring, src.render for charts).
+
+Inputs can be arbitrarily long iterators, so only a bounded number of chunks is
+ever in flight: enough to keep every worker busy, without reading ahead of what
+the consumer has taken.
+"""
+from collections import deque
+from itertools import islice
+
+
+def chunked(items, size):
+    """Yield lists of up to size items."""
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def max_pending(processes):
+    """Chunks to keep in flight for a pool of this many processes."""
+    return processes * 2
+
+
+def ordered_map(pool, func, chunks, limit):
+    """Like pool.imap(func, chunks), but with at most `limit` chunks submitted ahead."""
+    pending = deque()
+    for chunk in chunks:
+        pending.append(pool.apply_async(func, (chunk,)))
+        if len(pending) >= limit:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
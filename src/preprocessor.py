@@ -1,36 +1,151 @@
 import re
+from functools import lru_cache
 
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer
+from src.instrumentation import timed
+from src.phrases import find_phrases
+from src.stem_cache import stem
 
-stemmer = PorterStemmer()
-
-STOP_WORDS = set(stopwords.words("english"))
 # Keep negation words — they're critical for the scoring engine
-STOP_WORDS -= {
+KEPT_STOP_WORDS = {
     "not", "no", "nor", "never", "neither",
     "nobody", "nothing", "nowhere", "hardly", "barely",
 }
 
+
+@lru_cache(maxsize=None)
+def get_stop_words():
+    """NLTK's English stop words minus KEPT_STOP_WORDS, loaded from the corpus on first use."""
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words("english")) - KEPT_STOP_WORDS
+
+
+@lru_cache(maxsize=None)
+def _treebank():
+    from nltk.tokenize import NLTKWordTokenizer
+    return NLTKWordTokenizer()
+
+
+def __getattr__(name):
+    # STOP_WORDS is loaded lazily by get_stop_words()
+    if name == "STOP_WORDS":
+        return get_stop_words()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # Text emoticon patterns to extract before cleaning
 EMOTICON_PATTERNS = [
     ":)", ":-)", ":(", ":-(", ":D", "D:", ">:(", ";)", ":/", "<3",
 ]
 
 
-def extract_emoticons(text):
+class EmoticonMatcher:
+    """Finds the emoticons/emoji of a table in one left-to-right scan.
+
+    A regex character class of the patterns' first characters skips ahead to the
+    next position where a pattern could start; that scan runs in C with one
+    bitmap lookup per character. From each such position a character trie
+    (nested dicts) is walked for the longest pattern starting there, so the work
+    per candidate is bounded by the longest pattern. Neither step depends on how
+    many patterns the table has. (A regex alternation would try its branches
+    one after another at every position, so its cost grows with the table.)
+    Matches don't overlap: leftmost first, then longest (`>:(` over `:(`).
+
+    re only builds the bitmap for characters in the Basic Multilingual Plane and
+    tests any others one by one, so first characters beyond U+FFFF (most emoji)
+    are covered by a single range instead; the trie rejects the ones that start
+    no pattern.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._trie = {}
+        for pattern in self.patterns:
+            node = self._trie
+            for char in pattern:
+                node = node.setdefault(char, {})
+            node[""] = True  # end-of-pattern marker; never a character
+        first = "".join(re.escape(char) for char in sorted(self._trie) if char <= "\uffff")
+        if any(char > "\uffff" for char in self._trie):
+            first += "\U00010000-\U0010ffff"
+        self._first = re.compile(f"[{first}]" if first else "(?!)")
+
+    def finditer(self, text):
+        """Yield (emoticon, start, end) for every match in text, in order."""
+        search = self._first.search
+        trie = self._trie
+        n = len(text)
+        candidate = search(text)
+        while candidate is not None:
+            start = candidate.start()
+            node, end, i = trie, None, start
+            while i < n:
+                node = node.get(text[i])
+                if node is None:
+                    break
+                i += 1
+                if "" in node:
+                    end = i
+            if end is None:
+                candidate = search(text, start + 1)
+            else:
+                yield text[start:end], start, end
+                candidate = search(text, end)
+
+
+EMOTICON_MATCHER = EmoticonMatcher(EMOTICON_PATTERNS)
+
+
+def find_emoticons(text, matcher=EMOTICON_MATCHER):
+    """Return (emoticon, start, end) for every emoticon in text, in order of appearance."""
+    return list(matcher.finditer(text))
+
+
+PREPROCESS_MODES = ["accurate", "fast"]
+
+# A sentence ends at . ! or ? followed by whitespace, or at a line break
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+
+# A chunk is a run of non-whitespace plus a single literal space on either side, if
+# present. A few NLTK rules (e.g. '' -> ``, splitting a trailing apostrophe) look at
+# one neighbouring space, so those spaces are part of the cache key.
+_CHUNK_RE = re.compile(r"( ?\S+)(?=( ?))")
+
+
+def extract_emoticons(text, matcher=EMOTICON_MATCHER):
     """Find and remove emoticons from text before cleaning.
 
-    Returns the cleaned text and a list of found emoticons.
+    Returns the text with each emoticon replaced by a space and a list of found
+    emoticons, in order of appearance.
     Emoticons must be extracted first — regex cleaning would destroy them.
     """
-    found = []
-    for pattern in EMOTICON_PATTERNS:
-        while pattern in text:
-            found.append(pattern)
-            text = text.replace(pattern, " ", 1)
-    return text, found
+    found, parts, last = [], [], 0
+    for emoticon, start, end in matcher.finditer(text):
+        found.append(emoticon)
+        parts.append(text[last:start])
+        last = end
+    if not found:
+        return text, found
+    parts.append(text[last:])
+    return " ".join(parts), found
+
+
+def split_sentences(text):
+    """Split raw text into sentences, dropping empty ones.
+
+    Runs before cleaning, which strips the sentence punctuation. Every entry point
+    (preprocess in both modes, live and streaming scoring) splits with this rule.
+    """
+    return [s for s in (part.strip() for part in SENTENCE_END_RE.split(text)) if s]
+
+
+def extract_sentence_emoticons(sentences, matcher=EMOTICON_MATCHER):
+    """extract_emoticons on each sentence: returns the cleaned sentences and all emoticons, in order."""
+    texts, found = [], []
+    for sentence in sentences:
+        text, emoticons = extract_emoticons(sentence, matcher)
+        texts.append(text)
+        found.extend(emoticons)
+    return texts, found
 
 
 def clean_text(text):
@@ -43,51 +158,195 @@ def clean_text(text):
 def tokenize(text):
     """Split text into sentences, then each sentence into words.
 
-    Returns a list of lists: [[word, word, ...], [word, word, ...]]
+    Returns a list of lists: [[word, word, ...], [word, word, ...]]. Cleaned text
+    has no sentence punctuation left, so this gives one sentence (or none).
     """
+    from nltk.tokenize import sent_tokenize, word_tokenize
     sentences = sent_tokenize(text)
     return [word_tokenize(sentence) for sentence in sentences]
 
 
+def stem_word(word):
+    """Stem a token; a merged phrase ("scared to death") is stemmed word by word."""
+    if " " in word:
+        return " ".join(stem(w) for w in word.split(" "))
+    return stem(word)
+
+
 def stem_tokens(tokenized_sentences):
     """Stem every token so it matches the stemmed lexicon keys."""
-    return [[stemmer.stem(word) for word in sentence] for sentence in tokenized_sentences]
+    return [[stem_word(word) for word in sentence] for sentence in tokenized_sentences]
+
+
+def fold_phrases(original, stemmed, phrases):
+    """Join each lexicon phrase in a sentence into one token.
+
+    original and stemmed are the sentence's tokens before stop-word removal;
+    phrases is a trie from src.phrases.phrase_trie. Returns both lists with each
+    match replaced by a single token: its words joined by spaces in original,
+    the phrase key in stemmed.
+    """
+    matches = find_phrases(stemmed, phrases)
+    if not matches:
+        return original, stemmed
+    original, stemmed = list(original), list(stemmed)
+    for start, end, key in reversed(matches):
+        original[start:end] = [" ".join(original[start:end])]
+        stemmed[start:end] = [key]
+    return original, stemmed
+
+
+def merge_phrases(tokenized_sentences, phrases):
+    """Join the lexicon phrases in each tokenized sentence into single tokens (see fold_phrases)."""
+    return [fold_phrases(sentence, [stem(w) for w in sentence], phrases)[0] for sentence in tokenized_sentences]
 
 
 def remove_stop_words(tokenized_sentences):
     """Remove stop words but keep negation words intact."""
-    return [[w for w in sentence if w not in STOP_WORDS] for sentence in tokenized_sentences]
+    stop_words = get_stop_words()
+    return [[w for w in sentence if w not in stop_words] for sentence in tokenized_sentences]
 
 
-def preprocess(text):
-    """Full preprocessing pipeline: extract emoticons → clean → tokenize → remove stops → stem.
+@lru_cache(maxsize=100000)
+def _fast_chunk(chunk):
+    """Clean, tokenize, stop-filter and stem one whitespace-delimited chunk.
+
+    Returns (original_tokens, stemmed_tokens) tuples with stop words removed,
+    followed by the same two with them kept (for phrase matching), or None if
+    cleaning leaves nothing. Natural text repeats chunks constantly, so most
+    calls are cache hits.
+    """
+    cleaned = re.sub(r"[^a-z\s']", "", chunk.lower())
+    if not cleaned.strip():
+        return None
+    stop_words = get_stop_words()
+    tokens = tuple(_treebank().tokenize(cleaned))
+    stems = tuple(stem(w) for w in tokens)
+    kept = [i for i, w in enumerate(tokens) if w not in stop_words]
+    return tuple(tokens[i] for i in kept), tuple(stems[i] for i in kept), tokens, stems
+
+
+def clear_chunk_cache():
+    """Empty the fast path's per-chunk cache (the stem cache is separate, see stem_cache)."""
+    _fast_chunk.cache_clear()
+
+
+def _preprocess_fast(text, phrases=None):
+    """Single-pass equivalent of split → clean → tokenize → (match phrases) → remove stops → stem.
+
+    Each cleaned sentence is one punkt sentence (or none) in the accurate path, so
+    this path skips punkt and walks each sentence chunk by chunk.
+    tests/test_preprocess_parity.py checks that both paths give the same output.
+    """
+    stemmed, original, emoticons = [], [], []
+    for sentence in split_sentences(text):
+        sentence, found = extract_emoticons(sentence)
+        emoticons.extend(found)
+        tokens = _fast_sentence(sentence, phrases)
+        if tokens is not None:
+            stemmed.append(tokens[1])
+            original.append(tokens[0])
+    return stemmed, original, emoticons
+
+
+def _fast_sentence(text, phrases):
+    """(original, stemmed) tokens of one emoticon-free sentence, or None if cleaning leaves nothing."""
+    # with phrases, collect every token and drop the stop words after matching
+    part = 2 if phrases else 0
+    original, stemmed = [], []
+    last = None  # (key, tokens) of the latest chunk that survived cleaning
+    for chunk, trailing in _CHUNK_RE.findall(text):
+        key = chunk + trailing
+        tokens = _fast_chunk(key)
+        if tokens is None:
+            continue
+        if last is None:
+            # clean_text strips the text, so nothing precedes the first real chunk
+            key = key.lstrip(" ")
+            tokens = _fast_chunk(key)
+        else:
+            original.extend(last[1][part])
+            stemmed.extend(last[1][part + 1])
+        last = (key, tokens)
+
+    if last is None:
+        return None
+    # ...and nothing follows the last one
+    tokens = _fast_chunk(last[0].rstrip(" "))
+    original.extend(tokens[part])
+    stemmed.extend(tokens[part + 1])
+    if phrases:
+        original, stemmed = fold_phrases(original, stemmed, phrases)
+        stop_words = get_stop_words()
+        kept = [i for i, w in enumerate(original) if w not in stop_words]
+        original = [original[i] for i in kept]
+        stemmed = [stemmed[i] for i in kept]
+    return original, stemmed
+
+
+def unfiltered_stems(text):
+    """Stemmed tokens of text with stop words kept, as phrase matching sees them."""
+    text, _ = extract_emoticons(text)
+    tokens = _fast_chunk(clean_text(text))
+    return list(tokens[3]) if tokens else []
+
+
+def preprocess(text, mode="accurate", stats=None, phrases=None):
+    """Full preprocessing pipeline: split sentences → extract emoticons → clean → tokenize → remove stops → stem.
+
+    mode="accurate" runs each NLTK stage in turn; mode="fast" produces the same
+    output in one cached pass over the text (see _preprocess_fast). An optional
+    instrumentation.PipelineStats gets per-stage timings and token counts.
+
+    phrases is the lexicon's phrase trie (src.phrases.phrase_trie(lexicon)).
+    Phrases are matched before stop words are removed, and each match becomes
+    one token: "scared to death" in original_tokens and its key "scare to
+    death" in stemmed. Without it, multi-word lexicon entries never match.
 
     Returns:
         stemmed: list of lists of stemmed tokens (for scoring)
         original_tokens: list of lists of unstemmed tokens (for display/highlighting)
         emoticons: list of emoticon strings found in the text
     """
-    # 1. Extract emoticons before cleaning destroys them
-    text, emoticons = extract_emoticons(text)
+    if mode == "fast":
+        stemmed, original_tokens, emoticons = timed(stats, "preprocess_fast", _preprocess_fast, text, phrases)
+        _count_preprocessed(stats, stemmed, emoticons)
+        return stemmed, original_tokens, emoticons
+    if mode != "accurate":
+        raise ValueError(f"unknown preprocess mode: {mode!r} (expected one of {PREPROCESS_MODES})")
+
+    # 1. Split into sentences while the punctuation is still there
+    sentences = timed(stats, "split_sentences", split_sentences, text)
 
-    # 2. Clean the text
-    text = clean_text(text)
+    # 2. Extract emoticons before cleaning destroys them
+    sentences, emoticons = timed(stats, "extract_emoticons", extract_sentence_emoticons, sentences)
 
-    # 3. Tokenize into sentences → words
-    tokenized = tokenize(text)
+    # 3. Clean each sentence
+    sentences = timed(stats, "clean_text", lambda: [clean_text(s) for s in sentences])
 
-    # 4. Remove stop words (keep negation)
-    filtered = remove_stop_words(tokenized)
+    # 4. Tokenize each sentence into words
+    tokenized = timed(stats, "tokenize", lambda: [words for s in sentences for words in tokenize(s)])
+    if phrases:
+        tokenized = timed(stats, "match_phrases", merge_phrases, tokenized, phrases)
 
-    # 5. Stem for lexicon lookup
-    stemmed = stem_tokens(filtered)
+    # 5. Remove stop words (keep negation)
+    filtered = timed(stats, "remove_stop_words", remove_stop_words, tokenized)
+
+    # 6. Stem for lexicon lookup
+    stemmed = timed(stats, "stem_tokens", stem_tokens, filtered)
 
     # Also keep the unstemmed filtered tokens for display purposes
     original_tokens = filtered
 
+    _count_preprocessed(stats, stemmed, emoticons)
     return stemmed, original_tokens, emoticons
 
 
+def _count_preprocessed(stats, stemmed, emoticons):
+    if stats is not None:
+        stats.add(documents=1, tokens=sum(len(sentence) for sentence in stemmed), emoticons=len(emoticons))
+
+
 if __name__ == "__main__":
     test_sentences = [
         "I'm so excited about the trip, but a little nervous too.",
@@ -102,3 +361,4 @@ if __name__ == "__main__":
         print(f"  Emoticons: {emoticons}")
         print(f"  Original tokens: {original}")
         print(f"  Stemmed tokens:  {stemmed}")
+        print(f"  Fast mode:       {preprocess(text, mode='fast')[0]}")
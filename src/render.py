@@ -0,0 +1,209 @@
+"""Headless bulk rendering of radar charts, one per scored document.
+
+plot_radar goes through pyplot, which builds a new figure per call and keeps
+it in pyplot's global figure manager until closed. RadarRenderer skips pyplot:
+it builds one Figure on an Agg canvas as a template and, for each profile,
+only swaps the polygon data. For PNG, the static parts (axes, grid, labels) are
+rasterized once. Each chart then restores that background, draws the polygon
+and title over it, and encodes the pixel buffer. SVG is vector output, so each
+chart is a full savefig of the template.
+
+render_charts spreads profiles over a process pool with one renderer per
+worker, and either writes a file per chart or returns the encoded bytes.
+
+Usage:
+    python -m src.batch reports.jsonl -o scores.jsonl
+    python -m src.render scores.jsonl -o charts/ --workers 0
+    python -m src.render scores.jsonl -o charts/ --format svg --title "Report {id}"
+"""
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from src.emotion_scorer import EMOTIONS
+from src.pooling import chunked, max_pending, ordered_map
+
+CHART_FORMATS = ["png", "svg"]
+DEFAULT_TITLE = "Emotion Profile"
+
+# per-worker state, set once by _init_worker
+_worker_renderer = None
+_worker_out_dir = None
+
+
+class RadarRenderer:
+    """One radar template figure, re-rendered for each {emotion: score} profile.
+
+    Args:
+        fmt: "png" or "svg"
+        dpi: resolution of PNG output (the figure is 5x5 inches)
+        title: chart title; may contain "{id}", filled from render()'s name
+    """
+
+    def __init__(self, fmt="png", dpi=100, title=DEFAULT_TITLE, emotions=EMOTIONS):
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f"unknown chart format: {fmt!r} (expected one of {CHART_FORMATS})")
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        from src.visualizer import _radar_angles, build_radar
+
+        self.format = fmt
+        self.title = title
+        self.emotions = list(emotions)
+        self.figure = Figure(figsize=(5, 5), dpi=dpi)
+        FigureCanvasAgg(self.figure)
+        self._angles = _radar_angles(len(self.emotions))
+        self._ax, self._fill, self._line = build_radar(self.figure, self.emotions, title, animated=True)
+        self._title = self._ax.title
+        self._title.set_animated(True)  # titles can differ per chart, so keep it off the background
+        self._background = None
+
+    def _set_profile(self, emotions, name):
+        import numpy as np
+
+        values = [emotions.get(e, 0) for e in self.emotions]
+        values.append(values[0])
+        self._line.set_ydata(values)
+        self._fill.set_xy(np.column_stack([self._angles, values]))
+        self._title.set_text(self.title.format(id=name) if name is not None else self.title)
+
+    def render(self, emotions, name=None):
+        """Return the chart for one profile as PNG or SVG bytes."""
+        self._set_profile(emotions, name)
+        if self.format == "svg":
+            # when saving, animated artists are drawn like any other
+            buf = io.BytesIO()
+            self.figure.savefig(buf, format="svg")
+            return buf.getvalue()
+
+        from PIL import Image
+
+        canvas = self.figure.canvas
+        if self._background is None:
+            canvas.draw()  # everything but the animated polygon and title
+            self._background = canvas.copy_from_bbox(self.figure.bbox)
+        else:
+            canvas.restore_region(self._background)
+        self._ax.draw_artist(self._fill)
+        self._ax.draw_artist(self._line)
+        self._ax.draw_artist(self._title)
+        image = Image.frombuffer("RGBA", canvas.get_width_height(), canvas.buffer_rgba(), "raw", "RGBA", 0, 1)
+        buf = io.BytesIO()
+        image.save(buf, format="png")
+        return buf.getvalue()
+
+    def render_to_file(self, emotions, path, name=None):
+        with open(path, "wb") as f:
+            f.write(self.render(emotions, name))
+        return path
+
+
+def chart_filename(name, fmt):
+    """File name for a chart: the record id with anything but word characters, '.' and '-' replaced.
+
+    When replacing changed the id, a short hash of the original is appended, so
+    ids like "doc/0" and "doc_0" don't overwrite each other's chart.
+    """
+    name = str(name)
+    safe = re.sub(r"[^\w.-]", "_", name)
+    if safe != name:
+        safe += "-" + hashlib.blake2b(name.encode("utf-8"), digest_size=4).hexdigest()
+    return safe + "." + fmt
+
+
+def _init_worker(fmt, dpi, title, emotions, out_dir):
+    global _worker_renderer, _worker_out_dir
+    _worker_renderer = RadarRenderer(fmt, dpi, title, emotions)
+    _worker_out_dir = out_dir
+
+
+def _render_chunk(chunk):
+    """Render a list of (name, emotions) pairs inside a worker: (name, path) or (name, bytes) each."""
+    renderer = _worker_renderer
+    if _worker_out_dir is None:
+        return [(name, renderer.render(emotions, name)) for name, emotions in chunk]
+    results = []
+    for name, emotions in chunk:
+        path = os.path.join(_worker_out_dir, chart_filename(name, renderer.format))
+        results.append((name, renderer.render_to_file(emotions, path, name)))
+    return results
+
+
+def render_charts(items, out_dir=None, fmt="png", processes=None, chunksize=16, dpi=100,
+                  title=DEFAULT_TITLE, emotions=EMOTIONS):
+    """Render a radar for each (name, {emotion: score}) pair, yielding results in input order.
+
+    Args:
+        items: iterable of (name, emotions) pairs, e.g. ids and batch results' "emotions"
+        out_dir: write each chart to out_dir/<name>.<fmt> (see chart_filename) and yield (name, path);
+                 without it, yield (name, bytes)
+        processes: worker processes (default: one per CPU); 1 renders in this process
+        chunksize: charts per task sent to a worker
+    """
+    processes = processes or os.cpu_count() or 1
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+    init_args = (fmt, dpi, title, emotions, out_dir)
+    if processes == 1:
+        _init_worker(*init_args)
+        for chunk in chunked(items, chunksize):
+            yield from _render_chunk(chunk)
+        return
+
+    with multiprocessing.Pool(processes, _init_worker, init_args) as pool:
+        for results in ordered_map(pool, _render_chunk, chunked(items, chunksize), max_pending(processes)):
+            yield from results
+
+
+def read_profiles(stream, id_field="id"):
+    """Yield (id, emotions) from JSON lines of batch results; the line number stands in for a missing id."""
+    for line_no, line in enumerate(stream, 1):
+        if line.strip():
+            result = json.loads(line)
+            yield result.get(id_field, line_no), result["emotions"]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.render",
+                                     description="Render a radar chart per batch result, headless.")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="JSON lines from src.batch, or '-' for stdin (default)")
+    parser.add_argument("-o", "--output-dir", required=True, help="directory to write the charts to")
+    parser.add_argument("--format", choices=CHART_FORMATS, default="png", help="chart format (default: png)")
+    parser.add_argument("--id-field", default="id", help="result field used for file names and titles")
+    parser.add_argument("--title", default=DEFAULT_TITLE,
+                        help='chart title; "{id}" is replaced by the record id')
+    parser.add_argument("--dpi", type=int, default=100, help="PNG resolution (default: 100)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes; 0 means one per CPU (default: 1, no pool)")
+    parser.add_argument("--chunksize", type=int, default=16, help="charts per worker task (default: 16)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    count = 0
+    start = time.perf_counter()
+    try:
+        for _ in render_charts(read_profiles(src, args.id_field), args.output_dir, args.format,
+                               args.workers or None, args.chunksize, args.dpi, args.title):
+            count += 1
+    finally:
+        if src is not sys.stdin:
+            src.close()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else 0.0
+    print(f"Rendered {count} charts in {elapsed:.2f}s ({rate:.1f} charts/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Content-addressed cache for scoring results.
+
+Results are stored under a hash of the whitespace-normalized input text plus a
+fingerprint of everything that can change a score: the lexicon contents,
+EMOJI_MAP, the negation/intensifier/flip tables, the emoticon patterns and the
+kept stop words (plus any caller options, such as the tokenizer mode). Editing
+any of them changes the fingerprint, so old entries simply stop matching; the
+SQLite tier also deletes them when it is opened.
+
+Two tiers: a bounded in-memory LRU, and optionally a SQLite file that survives
+restarts and can be shared by several processes. Values must be JSON-serializable
+to be stored on disk.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from src.emotion_scorer import (
+    EMOJI_MAP, EMOTION_FLIP, EMOTIONS, INTENSIFIER_BASE_WORDS, NEGATION_BASE_WORDS,
+)
+from src.preprocessor import EMOTICON_PATTERNS, KEPT_STOP_WORDS
+
+# bump when scoring code changes in a way the tables above don't capture
+CACHE_VERSION = 2
+
+
+_SPACE_RUN_RE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Collapse runs of whitespace and trim, so trivially different copies share an entry.
+
+    A run with a line break becomes one newline, since a line break ends a
+    sentence (preprocessor.split_sentences); any other run becomes one space.
+    """
+    return _SPACE_RUN_RE.sub(lambda m: "\n" if "\n" in m.group() else " ", text).strip()
+
+
+def lexicon_digest(lexicon):
+    """SHA-1 of a lexicon's contents (a MappedLexicon already carries its source's digest)."""
+    digest = getattr(lexicon, "source_digest", None)
+    if digest is not None:
+        return digest.hex()
+    return hashlib.sha1(json.dumps(lexicon, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def pipeline_fingerprint(lexicon, *options):
+    """Fingerprint of the lexicon, the scoring tables and any extra options (e.g. mode)."""
+    tables = {
+        "version": CACHE_VERSION,
+        "lexicon": lexicon_digest(lexicon),
+        "emotions": EMOTIONS,
+        "emoji_map": EMOJI_MAP,
+        "flip": EMOTION_FLIP,
+        "negations": NEGATION_BASE_WORDS,
+        "intensifiers": INTENSIFIER_BASE_WORDS,
+        "emoticons": EMOTICON_PATTERNS,
+        "kept_stop_words": sorted(KEPT_STOP_WORDS),
+        "options": [str(option) for option in options],
+    }
+    return hashlib.sha1(json.dumps(tables, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def text_key(text, fingerprint):
+    """Cache key for a piece of text under a given pipeline fingerprint."""
+    data = fingerprint.encode("ascii") + b"\0" + normalize_text(text).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """Bounded LRU of results, with an optional persistent SQLite tier behind it.
+
+    get_or_compute(text, compute) returns the cached value for text, or calls
+    compute(text), stores and returns the result. Entries are keyed by the
+    normalized text, but computed on the text as given, so a miss returns
+    exactly what an uncached call would. Thread-safe.
+    """
+
+    def __init__(self, fingerprint, maxsize=10000, path=None):
+        self.fingerprint = fingerprint
+        self.maxsize = maxsize
+        self.path = path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = 0
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            with self._db:
+                self._db.execute("CREATE TABLE IF NOT EXISTS results "
+                                 "(key TEXT PRIMARY KEY, fingerprint TEXT, value TEXT, created REAL)")
+                # entries from another lexicon/table version can never match again
+                self._db.execute("DELETE FROM results WHERE fingerprint != ?", (fingerprint,))
+
+    def key(self, text):
+        return text_key(text, self.fingerprint)
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, text, default=None):
+        """Return the cached value for text, or default (a miss is counted)."""
+        key = self.key(text)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return default
+
+    def put(self, text, value):
+        key = self.key(text)
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                     (key, self.fingerprint, json.dumps(value), time.time()))
+
+    def get_or_compute(self, text, compute):
+        missing = object()
+        value = self.get(text, missing)
+        if value is missing:
+            value = compute(text)
+            self.put(text, value)
+        return value
+
+    def stats(self):
+        """Hit/miss counts per tier and the overall hit rate."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "size": len(self._memory),
+                "maxsize": self.maxsize,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM results")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
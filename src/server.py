@@ -0,0 +1,369 @@
+"""Local HTTP scoring service with micro-batching.
+
+A small asyncio server (standard library only) that keeps a pool of worker
+processes warm — each loads the lexicon and the NLTK data once, as in
+src.parallel — and exposes the pipeline over JSON on 127.0.0.1:
+
+    POST /score     {"text": "..."}  or  {"texts": ["...", ...]}
+    GET  /health    liveness, queue depth and worker count
+    GET  /metrics   latency histograms, batch sizes and pipeline counters
+
+Concurrent requests are collected into micro-batches: a batch is sent to the
+pool once it has max_batch texts or its oldest text has waited max_wait_ms.
+At most one batch per worker is in flight. When the queue is full, /score
+answers 503 with a Retry-After header instead of queueing without bound.
+If scoring itself fails (e.g. a worker process died), /score answers 500 and
+the error is counted under "errors" in /metrics.
+With --reload-interval, every worker watches the lexicon file and swaps in a
+rebuilt lexicon without a restart; results then carry "lexicon_version".
+
+Usage:
+    python -m src.server --port 8765 --workers 4
+    curl -s localhost:8765/score -d '{"text": "I am so happy today :)"}'
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from src.emotion_scorer import LEXICON_PATH, load_lexicon
+from src.instrumentation import LatencyHistogram, PipelineStats
+from src.parallel import _init_worker, _score_chunk
+from src.preprocessor import PREPROCESS_MODES
+
+HOST = "127.0.0.1"  # never exposed beyond this machine
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class QueueFull(Exception):
+    """The batching queue has no room for a request's texts."""
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _score_batch(texts):
+    """Worker side: score a list of texts; returns (summaries, exported pipeline stats)."""
+    results, exported = _score_chunk(list(enumerate(texts)))
+    for result in results:
+        del result["id"]
+    return results, exported
+
+
+class ScoringServer:
+    """Micro-batching scorer behind an asyncio HTTP front end."""
+
+    def __init__(self, lexicon_path=LEXICON_PATH, workers=1, max_batch=32, max_wait_ms=5.0,
+                 max_queue=1024, mode="accurate", binary=False, warm_stems=False, per_sentence=False,
+                 reload_interval=0):
+        self.lexicon_path = lexicon_path
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.binary = binary
+        self._init_args = (lexicon_path, per_sentence, warm_stems, mode, binary, True, reload_interval)
+
+        self.stats = PipelineStats()
+        self.latency = {
+            "request": LatencyHistogram(),     # /score, end to end
+            "queue_wait": LatencyHistogram(),  # enqueue until its batch starts
+            "batch": LatencyHistogram(),       # one batch in a worker, round trip
+        }
+        self.batch_sizes = {}
+        self.responses = {}
+        self.rejected = 0
+        self.errors = {}  # exception type -> count, for failed /score requests
+        self.started = None
+
+        self._queue = None
+        self._slots = None
+        self._executor = None
+        self._server = None
+        self._batcher = None
+        self._in_flight = set()
+        self._connections = {}  # handler task -> its writer
+
+    # --- lifecycle ---
+
+    async def start(self, port=8765):
+        """Start the workers and the batcher, then listen on 127.0.0.1:port."""
+        if self.binary:
+            # rebuild a stale binary once here rather than racing in every worker
+            load_lexicon(self.lexicon_path, binary=True)
+        self._queue = asyncio.Queue(self.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=self._init_args)
+
+        # spin the workers up now so the first request doesn't pay for loading
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _score_batch, ["warm up"])
+                               for _ in range(self.workers)))
+
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_server(self._handle, HOST, port)
+        self.started = time.monotonic()
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            # end idle keep-alive connections so their handlers return cleanly
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    # --- batching ---
+
+    async def score(self, texts):
+        """Queue texts for scoring and wait for their results.
+
+        Raises QueueFull, without queueing anything, if they don't all fit, and
+        HTTPError 413 if there are more than max_queue of them, since those
+        could never fit.
+        """
+        if len(texts) > self.max_queue:
+            raise HTTPError(413, f"too many texts in one request ({len(texts)}, at most {self.max_queue})")
+        if self.max_queue - self._queue.qsize() < len(texts):
+            self.rejected += 1
+            raise QueueFull(f"queue is full ({self._queue.qsize()}/{self.max_queue})")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._queue.put_nowait((text, future, time.perf_counter()))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+
+            await self._slots.acquire()
+            task = asyncio.create_task(self._run_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            self.latency["queue_wait"].observe(started - enqueued)
+        self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+        try:
+            results, exported = await loop.run_in_executor(
+                self._executor, _score_batch, [text for text, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self.stats.merge(exported)
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():  # the client may have gone away
+                    future.set_result(result)
+        finally:
+            self.latency["batch"].observe(time.perf_counter() - started)
+            self._slots.release()
+
+    # --- HTTP ---
+
+    async def _handle(self, reader, writer):
+        """Serve requests on one connection until the client closes it or asks to."""
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload, extra = await self._route(method, path, body)
+                await self._respond(writer, status, payload, keep_alive, extra)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self._connections[task]
+            writer.close()
+
+    async def _route(self, method, path, body):
+        path = path.split("?", 1)[0]
+        if path == "/score":
+            if method != "POST":
+                return 405, {"error": "use POST"}, ()
+            started = time.perf_counter()
+            try:
+                texts, single = _parse_score_body(body)
+                results = await self.score(texts)
+            except HTTPError as e:
+                return e.status, {"error": str(e)}, ()
+            except QueueFull as e:
+                return 503, {"error": str(e)}, (("Retry-After", "1"),)
+            except Exception as e:  # from the pool, e.g. BrokenProcessPool after a worker died
+                name = type(e).__name__
+                self.errors[name] = self.errors.get(name, 0) + 1
+                return 500, {"error": f"scoring failed: {name}: {e}"}, ()
+            self.latency["request"].observe(time.perf_counter() - started)
+            return 200, ({"result": results[0]} if single else {"results": results}), ()
+        if path in ("/health", "/metrics"):
+            if method != "GET":
+                return 405, {"error": "use GET"}, ()
+            return 200, self.health() if path == "/health" else self.metrics(), ()
+        return 404, {"error": f"no such endpoint: {path}"}, ()
+
+    async def _respond(self, writer, status, payload, keep_alive=True, extra_headers=()):
+        self.responses[status] = self.responses.get(status, 0) + 1
+        body = json.dumps(payload).encode("utf-8")
+        lines = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines += [f"{name}: {value}" for name, value in extra_headers]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    def health(self):
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "uptime_s": round(time.monotonic() - self.started, 1),
+        }
+
+    def metrics(self):
+        return {
+            "latency": {name: histogram.to_dict() for name, histogram in self.latency.items()},
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+            "responses": self.responses,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "queue_depth": self._queue.qsize(),
+            "pipeline": self.stats.to_dict(),
+        }
+
+
+async def _read_request(reader):
+    """Read one HTTP/1.1 request; returns (method, path, headers, body) or None at EOF."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, path, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "malformed request line") from None
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400, "bad Content-Length") from None
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def _parse_score_body(body):
+    """Return (texts, single) from a /score JSON body."""
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "body is not valid JSON") from None
+    if isinstance(payload, dict) and isinstance(payload.get("text"), str):
+        return [payload["text"]], True
+    texts = payload.get("texts") if isinstance(payload, dict) else None
+    if isinstance(texts, list) and texts and all(isinstance(t, str) for t in texts):
+        return texts, False
+    raise HTTPError(400, 'expected {"text": "..."} or {"texts": ["...", ...]}')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.server",
+                                     description=f"Serve emotion scoring over HTTP on {HOST}.")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes (default: 1)")
+    parser.add_argument("--max-batch", type=int, default=32, help="texts per micro-batch (default: 32)")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="longest a text waits for its batch to fill (default: 5)")
+    parser.add_argument("--max-queue", type=int, default=1024,
+                        help="queued texts before /score answers 503 (default: 1024)")
+    parser.add_argument("--lexicon", default=LEXICON_PATH, help="path to the emotion lexicon")
+    parser.add_argument("--binary-lexicon", action="store_true",
+                        help="memory-map the binary lexicon (rebuilt from the JSON if stale)")
+    parser.add_argument("--tokenizer", choices=PREPROCESS_MODES, default="accurate",
+                        help="'fast' gives the same tokens in one cached pass (default: accurate)")
+    parser.add_argument("--per-sentence", action="store_true",
+                        help="include raw per-sentence scores in each result")
+    parser.add_argument("--warm-stems", action="store_true",
+                        help="pre-warm each worker's stem cache with the lexicon's source words")
+    parser.add_argument("--reload-interval", type=float, default=0, metavar="SECONDS",
+                        help="check the lexicon file this often and reload it when it changes (default: 0, off)")
+    return parser
+
+
+async def serve(args):
+    server = ScoringServer(args.lexicon, args.workers, args.max_batch, args.max_wait_ms, args.max_queue,
+                           args.tokenizer, args.binary_lexicon, args.warm_stems, args.per_sentence,
+                           args.reload_interval)
+    listener = await server.start(args.port)
+    print(f"Scoring on http://{HOST}:{args.port} with {args.workers} worker(s)", file=sys.stderr)
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""Shared, size-bounded memo cache for Porter stemming.
+
+Natural text reuses a small vocabulary heavily, so the preprocessor, the scorer
+and the lexicon builder all stem through this one LRU cache instead of each
+holding its own PorterStemmer. Set EMOTION_STEM_CACHE_SIZE to change the bound.
+"""
+import os
+from functools import lru_cache
+
+STEM_CACHE_SIZE = int(os.environ.get("EMOTION_STEM_CACHE_SIZE", "50000"))
+
+
+@lru_cache(maxsize=None)
+def _stemmer():
+    # NLTK is only imported once something actually needs stemming
+    from nltk.stem import PorterStemmer
+    return PorterStemmer()
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word):
+    """Porter-stem a word, remembering the most recently used results."""
+    return _stemmer().stem(word)
+
+
+def warm_stem_cache(words):
+    """Pre-stem an iterable of unstemmed words (e.g. the lexicon's source words) so the first documents hit the cache."""
+    for word in words:
+        stem(word)
+
+
+def stem_cache_stats():
+    """Return hit/miss counts, current size and hit rate of the shared cache."""
+    info = stem.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+    }
+
+
+def clear_stem_cache():
+    """Empty the cache and reset its statistics."""
+    stem.cache_clear()
@@ -0,0 +1,172 @@
+"""Constant-memory scoring of very large single documents.
+
+score_text needs the whole document preprocessed up front. StreamingScorer
+instead reads text in chunks, splits it into sentences with the same rule as
+preprocess (src.preprocessor.split_sentences), and scores each sentence as
+soon as it is complete. A sentence cut by a chunk boundary is held back until
+the next chunk completes it. Only running totals are kept, so memory stays flat
+however long the document is. The final emotions and dominant emotion, and the
+sentence scores, match score_text on the whole document (checked by
+benchmarks.streaming_parity), as long as no sentence runs past
+max_sentence_chars and has to be cut.
+
+Usage:
+    python -m src.streaming transcript.txt
+    cat transcript.txt | python -m src.streaming --per-sentence > sentences.jsonl
+"""
+import argparse
+import json
+import sys
+
+from src.emotion_scorer import (
+    EMOTIONS, LEXICON_PATH, load_lexicon, normalize_emotions, score_emoticons, score_sentence,
+)
+from src.phrases import phrase_trie
+from src.preprocessor import PREPROCESS_MODES, SENTENCE_END_RE, preprocess
+
+CHUNK_SIZE = 1 << 16
+# text with no sentence break for this long is split at its last space anyway
+MAX_SENTENCE_CHARS = 100000
+
+
+class StreamingScorer:
+    """Scores one document fed to it piece by piece.
+
+    feed(text) yields a result dict for each sentence it completes, finish()
+    flushes the last one, and result() returns the document's normalized
+    emotions and dominant emotion from the running totals. score_file() does
+    all three over an open text stream.
+
+    Sentences are the ones score_text reports in per_sentence: one that cleaning
+    leaves empty (e.g. only emoticons) yields no result, but its emoticons still
+    count towards the totals. Each sentence result has:
+        sentence:     0-based sentence number
+        emotions:     raw {emotion: score} for the sentence
+        emoticons:    emoticons found in it
+        word_results: [(token, {emotion: score})], only with word_results=True
+    """
+
+    def __init__(self, lexicon, mode="fast", word_results=False, max_sentence_chars=MAX_SENTENCE_CHARS,
+                 stats=None):
+        if mode not in PREPROCESS_MODES:
+            raise ValueError(f"unknown preprocess mode: {mode!r} (expected one of {PREPROCESS_MODES})")
+        self.lexicon = lexicon
+        self.phrases = phrase_trie(lexicon)
+        self.mode = mode
+        self.word_results = word_results
+        self.max_sentence_chars = max_sentence_chars
+        self.stats = stats
+        self.reset()
+
+    def reset(self):
+        """Start a new document."""
+        self._pending = ""
+        self._totals = {e: 0 for e in EMOTIONS}
+        # kept apart and added last, in the same order as score_text adds them
+        self._emoticon_totals = {e: 0 for e in EMOTIONS}
+        self.sentences = 0
+        self.emoticons = 0
+
+    def _score(self, sentence):
+        """Score one split sentence, yielding its result unless cleaning left nothing."""
+        stemmed, _, emoticons = preprocess(sentence, self.mode, self.stats, self.phrases)
+        for emoticon in emoticons:
+            for emotion, score in score_emoticons([emoticon], self.stats).items():
+                self._emoticon_totals[emotion] += score
+        self.emoticons += len(emoticons)
+        output = "full" if self.word_results else "summary"
+        for tokens in stemmed:
+            sentence_emotions, word_results = score_sentence(tokens, self.lexicon, self.stats, output)
+            for emotion, score in sentence_emotions.items():
+                self._totals[emotion] += score
+
+            result = {"sentence": self.sentences, "emotions": sentence_emotions, "emoticons": emoticons}
+            if self.word_results:
+                result["word_results"] = word_results
+            self.sentences += 1
+            yield result
+
+    def feed(self, text):
+        """Add the next piece of the document, yielding results for the sentences it completes."""
+        sentences, self._pending = split_complete(self._pending + text)
+        while len(self._pending) > self.max_sentence_chars:
+            # no sentence break in sight; cut at a space so no word is split
+            cut = self._pending.rfind(" ", 0, self.max_sentence_chars) + 1 or self.max_sentence_chars
+            sentences.append(self._pending[:cut])
+            self._pending = self._pending[cut:]
+        for sentence in sentences:
+            if sentence.strip():
+                yield from self._score(sentence.strip())
+
+    def finish(self):
+        """Score whatever is left after the last sentence break."""
+        pending, self._pending = self._pending.strip(), ""
+        if pending:
+            yield from self._score(pending)
+
+    def result(self):
+        """Normalized emotions and dominant emotion over everything scored so far."""
+        totals = dict(self._totals)
+        if self.emoticons:
+            for emotion, score in self._emoticon_totals.items():
+                totals[emotion] += score
+        normalized, dominant = normalize_emotions(totals)
+        return {
+            "emotions": normalized,
+            "dominant": dominant,
+            "sentences": self.sentences,
+            "emoticons": self.emoticons,
+        }
+
+    def score_file(self, stream, chunk_size=CHUNK_SIZE):
+        """Read an open text stream chunk by chunk, yielding every sentence result.
+
+        Call result() afterwards for the document totals.
+        """
+        self.reset()
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            yield from self.feed(chunk)
+        yield from self.finish()
+
+
+def split_complete(text):
+    """Split text like split_sentences, holding back the piece after the last break.
+
+    Returns (sentences, tail). The tail may be the start of a sentence that
+    continues in the next chunk, so it is neither scored nor stripped yet.
+    """
+    parts = SENTENCE_END_RE.split(text)
+    tail = parts.pop()
+    return [s for s in (part.strip() for part in parts) if s], tail
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.streaming",
+                                     description="Score one large document in constant memory.")
+    parser.add_argument("input", nargs="?", default="-", help="text file, or '-' for stdin (default)")
+    parser.add_argument("--lexicon", default=LEXICON_PATH, help="path to the emotion lexicon")
+    parser.add_argument("--tokenizer", choices=PREPROCESS_MODES, default="fast",
+                        help="preprocessing mode (default: fast)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="characters read at a time")
+    parser.add_argument("--per-sentence", action="store_true",
+                        help="write one JSON line per sentence before the document summary")
+    args = parser.parse_args(argv)
+
+    scorer = StreamingScorer(load_lexicon(args.lexicon), args.tokenizer)
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        for result in scorer.score_file(src, args.chunk_size):
+            if args.per_sentence:
+                sys.stdout.write(json.dumps(result) + "\n")
+    finally:
+        if src is not sys.stdin:
+            src.close()
+    print(json.dumps(scorer.result()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,12 @@
-import matplotlib.pyplot as plt
-import numpy as np
+"""Charts and word colors for emotion results.
+
+matplotlib and NumPy are imported inside the plotting functions, so code that only
+needs EMOTION_COLORS / get_word_color (like the GUI at startup) doesn't load them.
+plot_radar / plot_timeline build one-off pyplot figures; EmotionCharts keeps its
+figures and updates them in place, for windows that redraw on every analysis.
+src.render draws radars in bulk, headless, from the same build_radar template.
+"""
+from src.emotion_scorer import EMOTIONS
 
 EMOTION_COLORS = {
     "joy":      "#FFD700",  # gold
@@ -13,6 +20,9 @@ EMOTION_COLORS = {
 
 def plot_radar(emotions, title="Emotion Profile"):
     """Create a radar (spider) chart showing emotion intensities as a filled polygon."""
+    import matplotlib.pyplot as plt
+    import numpy as np
+
     labels = list(emotions.keys())
     values = list(emotions.values())
     values += values[:1]  # close the polygon
@@ -30,31 +40,263 @@ def plot_radar(emotions, title="Emotion Profile"):
     return fig
 
 
-def plot_timeline(per_sentence_scores):
+# Above this many sentences the timeline is aggregated down to this many points,
+# so render cost stays bounded however long the document is
+TIMELINE_MAX_POINTS = 500
+TIMELINE_METHODS = ["mean", "max", "lttb"]
+# markers and one tick per sentence only while the timeline is this short
+MARKER_MAX_POINTS = 50
+TICK_MAX_POINTS = 20
+
+
+def lttb_indices(y, n_out):
+    """Pick n_out indices of y with Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each bucket in between, the point
+    forming the largest triangle with the previously kept point and the average
+    of the next bucket — so peaks survive, unlike with plain averaging.
+    """
+    import numpy as np
+
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+    return indices
+
+
+def downsample_series(y, max_points=TIMELINE_MAX_POINTS, method="mean"):
+    """Reduce a per-sentence series to at most max_points (x, y) points.
+
+    x is in 1-based sentence numbers. "mean" and "max" aggregate equal-width
+    windows (x at each window's centre); "lttb" keeps representative original
+    points. Series already short enough are returned unchanged.
+    """
+    import numpy as np
+
+    if method not in TIMELINE_METHODS:
+        raise ValueError(f"unknown downsampling method: {method!r} (expected one of {TIMELINE_METHODS})")
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(1, n + 1), y
+    if method == "lttb":
+        indices = lttb_indices(y, max_points)
+        return indices + 1, y[indices]
+
+    starts = np.linspace(0, n, max_points + 1).astype(int)
+    if method == "mean":
+        values = np.add.reduceat(y, starts[:-1]) / np.diff(starts)
+    else:
+        values = np.maximum.reduceat(y, starts[:-1])
+    return (starts[:-1] + starts[1:] + 1) / 2, values
+
+
+def rolling_band(y, window):
+    """Return (mean, std) of y over a trailing window, same length as y (shorter windows at the start)."""
+    import numpy as np
+
+    y = np.asarray(y, dtype=float)
+    counts = np.minimum(np.arange(1, len(y) + 1), window)
+    sums = np.cumsum(y)
+    squares = np.cumsum(y * y)
+    sums[window:] = sums[window:] - sums[:-window]
+    squares[window:] = squares[window:] - squares[:-window]
+    mean = sums / counts
+    std = np.sqrt(np.maximum(squares / counts - mean * mean, 0))
+    return mean, std
+
+
+def _timeline_matrix(per_sentence_scores, emotions):
+    import numpy as np
+    return np.array([[sent.get(e, 0) for e in emotions] for sent in per_sentence_scores], dtype=float)
+
+
+def _set_timeline_ticks(ax, x, n_sentences):
+    """One tick per sentence for short timelines, otherwise a few integer ticks."""
+    from matplotlib.ticker import MaxNLocator
+
+    if n_sentences <= TICK_MAX_POINTS:
+        ax.set_xticks(x)
+    else:
+        ax.xaxis.set_major_locator(MaxNLocator(nbins=10, integer=True))
+
+
+def plot_timeline(per_sentence_scores, max_points=TIMELINE_MAX_POINTS, method="mean", rolling=None,
+                  xlabel="Sentence"):
     """Create a line chart showing how emotions shift across sentences.
 
+    Documents with more than max_points sentences are downsampled with `method`
+    (see downsample_series). rolling=N adds a shaded rolling mean ± std band
+    over N sentences behind each line. Any list of {emotion: score} dicts works,
+    e.g. windows.WindowAggregator.profiles() with xlabel="Minute".
+
     Returns None if there's only one sentence (no timeline to show).
     """
     if len(per_sentence_scores) < 2:
         return None
 
+    import matplotlib.pyplot as plt
+
     emotions = list(per_sentence_scores[0].keys())
-    x = list(range(1, len(per_sentence_scores) + 1))
+    scores = _timeline_matrix(per_sentence_scores, emotions)
+    n = len(scores)
 
     fig, ax = plt.subplots(figsize=(8, 4))
-    for emotion in emotions:
+    for i, emotion in enumerate(emotions):
         color = EMOTION_COLORS.get(emotion, None)
-        y = [sent[emotion] for sent in per_sentence_scores]
-        ax.plot(x, y, label=emotion, marker="o", color=color)
+        x, y = downsample_series(scores[:, i], max_points, method)
+        marker = "o" if len(x) <= MARKER_MAX_POINTS else None
+        ax.plot(x, y, label=emotion, marker=marker, color=color)
+        if rolling:
+            mean, std = rolling_band(scores[:, i], rolling)
+            band_x, low = downsample_series(mean - std, max_points, "mean")
+            _, high = downsample_series(mean + std, max_points, "mean")
+            ax.fill_between(band_x, low, high, color=color, alpha=0.15, linewidth=0)
 
-    ax.set_xlabel("Sentence")
+    ax.set_xlabel(xlabel)
     ax.set_ylabel("Intensity")
-    ax.set_title("Emotion Timeline")
+    title = "Emotion Timeline"
+    if n > max_points:
+        title += f" ({method} of {n} {xlabel.lower()}s)"
+    ax.set_title(title)
     ax.legend(loc="upper right", fontsize="small")
-    ax.set_xticks(x)
+    _set_timeline_ticks(ax, x, n)
     return fig
 
 
+def _radar_angles(n):
+    """Angles for n radar spokes, with the first repeated to close the polygon."""
+    import numpy as np
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    return np.append(angles, angles[0])
+
+
+def build_radar(figure, emotions, title="Emotion Profile", animated=False):
+    """Add an empty radar (as drawn by plot_radar) to a pyplot-free Figure.
+
+    Returns (ax, fill, line); set the line's ydata and the fill's xy to show a
+    profile. animated=True leaves the polygon out of normal draws, for blitting.
+    """
+    angles = _radar_angles(len(emotions))
+    zeros = [0.0] * len(angles)
+    ax = figure.add_subplot(projection="polar")
+    fill, = ax.fill(angles, zeros, alpha=0.25, color="steelblue", animated=animated)
+    line, = ax.plot(angles, zeros, color="steelblue", linewidth=2, animated=animated)
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(emotions)
+    ax.set_ylim(0, 1)
+    ax.set_title(title, pad=20)
+    return ax, fill, line
+
+
+class EmotionCharts:
+    """Radar and timeline figures that are built once and updated in place.
+
+    The figures are plain matplotlib Figures (no pyplot state), so the caller
+    wraps each in whatever canvas it displays with — FigureCanvasTkAgg in the
+    GUI, FigureCanvasAgg headless. update() only swaps line/polygon data and
+    asks the canvas to redraw. With blit=True the radar (whose axes never
+    change) is redrawn by restoring a cached background and drawing just the
+    polygon, when the canvas supports it.
+    """
+
+    def __init__(self, emotions=EMOTIONS, title="Emotion Profile", blit=False):
+        from matplotlib.figure import Figure
+
+        self.emotions = list(emotions)
+        self.blit = blit
+        self._angles = _radar_angles(len(self.emotions))
+
+        self.radar_figure = Figure(figsize=(5, 5))
+        self._radar_ax, self._radar_fill, self._radar_line = build_radar(
+            self.radar_figure, self.emotions, title, animated=blit)
+        self._radar_background = None
+        if blit:
+            self.radar_figure.canvas.mpl_connect("draw_event", self._on_radar_draw)
+
+        self.timeline_figure = Figure(figsize=(8, 4))
+        ax = self.timeline_figure.add_subplot()
+        self._timeline_lines = {
+            emotion: ax.plot([], [], label=emotion, marker="o", color=EMOTION_COLORS.get(emotion))[0]
+            for emotion in self.emotions
+        }
+        ax.set_xlabel("Sentence")
+        ax.set_ylabel("Intensity")
+        ax.set_title("Emotion Timeline")
+        ax.legend(loc="upper right", fontsize="small")
+        self._timeline_ax = ax
+
+    def _on_radar_draw(self, event):
+        # a full draw leaves out the animated artists: cache the bare axes, then draw them on top
+        canvas = self.radar_figure.canvas
+        if hasattr(canvas, "copy_from_bbox"):
+            self._radar_background = canvas.copy_from_bbox(self._radar_ax.bbox)
+        self._draw_radar_artists()
+
+    def _draw_radar_artists(self):
+        self._radar_ax.draw_artist(self._radar_fill)
+        self._radar_ax.draw_artist(self._radar_line)
+
+    def update_radar(self, emotions):
+        """Show a new {emotion: score} profile on the radar."""
+        import numpy as np
+
+        values = [emotions.get(e, 0) for e in self.emotions]
+        values.append(values[0])
+        self._radar_line.set_ydata(values)
+        self._radar_fill.set_xy(np.column_stack([self._angles, values]))
+
+        canvas = self.radar_figure.canvas
+        if self.blit and self._radar_background is not None:
+            canvas.restore_region(self._radar_background)
+            self._draw_radar_artists()
+            canvas.blit(self._radar_ax.bbox)
+        else:
+            canvas.draw_idle()
+
+    def update_timeline(self, per_sentence_scores, max_points=TIMELINE_MAX_POINTS, method="mean"):
+        """Show per-sentence scores on the timeline, downsampled as in plot_timeline.
+
+        Returns False (and leaves the figure as it was) if there are fewer than
+        two sentences, in which case the caller may hide the timeline.
+        """
+        if len(per_sentence_scores) < 2:
+            return False
+
+        scores = _timeline_matrix(per_sentence_scores, self.emotions)
+        for i, line in enumerate(self._timeline_lines.values()):
+            x, y = downsample_series(scores[:, i], max_points, method)
+            line.set_data(x, y)
+            line.set_marker("o" if len(x) <= MARKER_MAX_POINTS else "None")
+
+        ax = self._timeline_ax
+        ax.relim()
+        ax.autoscale_view()
+        _set_timeline_ticks(ax, x, len(scores))
+        self.timeline_figure.canvas.draw_idle()
+        return True
+
+    def update(self, emotions, per_sentence_scores):
+        """Update both charts; returns whether the timeline has anything to show."""
+        self.update_radar(emotions)
+        return self.update_timeline(per_sentence_scores)
+
+
 def get_word_color(emotion_scores):
     """Return the hex color of the dominant emotion for a word, or None."""
     if not emotion_scores:
@@ -64,6 +306,8 @@ def get_word_color(emotion_scores):
 
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     # Test with dummy data
     dummy_emotions = {
         "joy": 0.72, "anger": 0.05, "sadness": 0.12,
@@ -86,6 +330,12 @@ if __name__ == "__main__":
     timeline_fig.savefig("/tmp/test_timeline.png", dpi=100, bbox_inches="tight")
     print("  Saved to /tmp/test_timeline.png")
 
+    print("Generating downsampled timeline (5000 sentences, LTTB, rolling band)...")
+    long_sentences = [dummy_sentences[i % 3] for i in range(5000)]
+    long_fig = plot_timeline(long_sentences, method="lttb", rolling=50)
+    long_fig.savefig("/tmp/test_timeline_long.png", dpi=100, bbox_inches="tight")
+    print("  Saved to /tmp/test_timeline_long.png")
+
     print("\nColor mapping test:")
     test_cases = [
         {"joy": 0.9},
@@ -0,0 +1,179 @@
+"""Rolling emotion aggregates over a timestamped stream of documents.
+
+WindowAggregator keeps per-bucket sums and counts of emotion vectors (e.g. the
+"emotions" of each score_text result) in NumPy ring buffers. It covers two
+kinds of window:
+
+    tumbling   fixed buckets of bucket_seconds (per minute, per hour, ...);
+               the last `history` of them are kept
+    sliding    the last `sliding` buckets as one window, with a running sum
+
+Adding a document is O(1). Moving time forward touches each bucket that is
+evicted once, so updates are O(1) amortized however long the stream runs.
+Documents older than the kept history are counted in `late` and dropped.
+profiles() gives one {emotion: mean score} dict per bucket, which plot_timeline
+draws directly.
+"""
+import numpy as np
+
+from src.emotion_scorer import EMOTIONS
+
+_NO_BUCKET = np.iinfo(np.int64).min  # marks a ring slot that holds no bucket yet
+
+
+class WindowAggregator:
+    """Tumbling buckets plus a sliding window over the most recent of them.
+
+    Args:
+        bucket_seconds: width of one tumbling window, in the timestamps' unit
+        history: number of most recent buckets kept
+        sliding: buckets in the sliding window (default: all of history)
+    """
+
+    def __init__(self, bucket_seconds=60, history=60, sliding=None, emotions=EMOTIONS):
+        sliding = history if sliding is None else sliding
+        if not 0 < sliding <= history:
+            raise ValueError(f"sliding must be between 1 and history ({history}), got {sliding}")
+        self.bucket_seconds = bucket_seconds
+        self.history = history
+        self.sliding = sliding
+        self.emotions = list(emotions)
+        self._sums = np.zeros((history, len(self.emotions)))
+        self._counts = np.zeros(history, dtype=np.int64)
+        self._ids = np.full(history, _NO_BUCKET, dtype=np.int64)  # bucket number in each slot
+        self._window_sum = np.zeros(len(self.emotions))
+        self._window_count = 0
+        self._latest = None
+        self.late = 0
+
+    def _vector(self, emotions):
+        if isinstance(emotions, dict):
+            return np.array([emotions.get(e, 0.0) for e in self.emotions], dtype=float)
+        return np.asarray(emotions, dtype=float)
+
+    def _advance(self, bucket):
+        """Make `bucket` the newest one, evicting whatever falls out of both windows."""
+        latest = self._latest
+        if bucket - latest >= self.history:
+            # a gap longer than the history: nothing survives
+            self._sums[:] = 0
+            self._counts[:] = 0
+            self._ids[:] = _NO_BUCKET
+            self._window_sum[:] = 0
+            self._window_count = 0
+        else:
+            for old in range(latest - self.sliding + 1, min(latest, bucket - self.sliding) + 1):
+                slot = old % self.history
+                if self._ids[slot] == old:
+                    self._window_sum -= self._sums[slot]
+                    self._window_count -= self._counts[slot]
+            if not self._window_count:
+                self._window_sum[:] = 0  # drop accumulated rounding error
+            for new in range(latest + 1, bucket + 1):
+                slot = new % self.history
+                self._sums[slot] = 0
+                self._counts[slot] = 0
+                self._ids[slot] = new
+        self._latest = bucket
+
+    def add(self, timestamp, emotions):
+        """Add one document's emotion vector ({emotion: score} or a sequence in
+        emotions order) at timestamp. Returns False if it is too old to keep."""
+        bucket = int(timestamp // self.bucket_seconds)
+        if self._latest is None:
+            self._latest = bucket
+        elif bucket > self._latest:
+            self._advance(bucket)
+        elif bucket <= self._latest - self.history:
+            self.late += 1
+            return False
+
+        slot = bucket % self.history
+        if self._ids[slot] != bucket:
+            self._sums[slot] = 0
+            self._counts[slot] = 0
+            self._ids[slot] = bucket
+        vector = self._vector(emotions)
+        self._sums[slot] += vector
+        self._counts[slot] += 1
+        if bucket > self._latest - self.sliding:
+            self._window_sum += vector
+            self._window_count += 1
+        return True
+
+    def add_result(self, timestamp, result):
+        """Add a score_text (or batch) result by its normalized "emotions"."""
+        return self.add(timestamp, result["emotions"])
+
+    def buckets(self, include_empty=False):
+        """Return (starts, sums, counts) for the kept buckets, oldest first.
+
+        starts are bucket start times; empty buckets are left out unless
+        include_empty is set.
+        """
+        if self._latest is None:
+            return np.zeros(0), np.zeros((0, len(self.emotions))), np.zeros(0, dtype=np.int64)
+        numbers = np.arange(self._latest - self.history + 1, self._latest + 1)
+        slots = numbers % self.history
+        held = self._ids[slots] == numbers
+        sums = np.where(held[:, None], self._sums[slots], 0.0)
+        counts = np.where(held, self._counts[slots], 0)
+        if not include_empty:
+            keep = counts > 0
+            numbers, sums, counts = numbers[keep], sums[keep], counts[keep]
+        return numbers * self.bucket_seconds, sums, counts
+
+    def profiles(self, include_empty=False):
+        """Mean emotion vector per bucket, as a list of {emotion: score} dicts (oldest first)."""
+        _, sums, counts = self.buckets(include_empty)
+        means = sums / np.maximum(counts, 1)[:, None]
+        return [dict(zip(self.emotions, row)) for row in means.tolist()]
+
+    def dominant_series(self, include_empty=False):
+        """(bucket start, dominant emotion) per bucket; None for an empty bucket."""
+        starts, sums, counts = self.buckets(include_empty)
+        top = sums.argmax(axis=1)
+        return [(start, self.emotions[i] if n else None)
+                for start, i, n in zip(starts.tolist(), top.tolist(), counts.tolist())]
+
+    def sliding_profile(self):
+        """Mean emotions, dominant emotion and document count over the sliding window."""
+        count = self._window_count
+        means = self._window_sum / max(count, 1)
+        profile = dict(zip(self.emotions, means.tolist()))
+        return {
+            "emotions": profile,
+            "dominant": max(profile, key=profile.get) if count else None,
+            "documents": int(count),
+        }
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    rng = random.Random(7)
+    per_minute = WindowAggregator(bucket_seconds=60, history=180, sliding=60)
+    per_hour = WindowAggregator(bucket_seconds=3600, history=24)
+
+    # three hours of messages, drifting from joy to anger
+    start = 1_700_000_000
+    n_messages = 200000
+    t0 = time.perf_counter()
+    for i in range(n_messages):
+        timestamp = start + i * 3 * 3600 / n_messages
+        drift = i / n_messages
+        vector = [rng.random() * (1 - drift), rng.random() * drift, 0.1, 0.1, 0.05, 0.05]
+        per_minute.add(timestamp, vector)
+        per_hour.add(timestamp, vector)
+    elapsed = time.perf_counter() - t0
+    print(f"{2 * n_messages} updates in {elapsed:.2f}s ({2 * n_messages / elapsed:,.0f}/s)")
+
+    print(f"Last hour: {per_minute.sliding_profile()}")
+    for bucket_start, dominant in per_hour.dominant_series():
+        print(f"  hour starting {bucket_start}: {dominant}")
+
+    from src.visualizer import plot_timeline
+    fig = plot_timeline(per_minute.profiles(), xlabel="Minute")
+    fig.savefig("/tmp/test_windows_timeline.png", bbox_inches="tight")
+    print("Saved /tmp/test_windows_timeline.png")
@@ -0,0 +1,13 @@
+"""Import-time budgets for the headless entry points (see benchmarks.import_time).
+
+Set IMPORT_TIME_SCALE (e.g. 2) to loosen every budget on a slow machine.
+"""
+import os
+
+from benchmarks.import_time import check_budgets
+
+
+def test_import_budgets():
+    # each module is imported in its own fresh interpreter
+    failures = check_budgets(scale=float(os.environ.get("IMPORT_TIME_SCALE", "1")))
+    assert failures == []
@@ -0,0 +1,19 @@
+"""preprocess(mode="fast") must match the NLTK pipeline (see benchmarks.preprocess_parity)."""
+import random
+
+import pytest
+
+from benchmarks.preprocess_parity import CASES, find_mismatches, random_text
+from src.emotion_scorer import load_lexicon
+from src.phrases import phrase_trie
+
+RANDOM_CASES = 2000
+
+
+@pytest.mark.parametrize("with_phrases", [False, True], ids=["no-phrases", "phrases"])
+def test_fast_matches_accurate(with_phrases):
+    rng = random.Random(0)
+    texts = CASES + [random_text(rng) for _ in range(RANDOM_CASES)]
+    phrases = phrase_trie(load_lexicon()) if with_phrases else None
+    # (text, accurate, fast) for each difference
+    assert find_mismatches(texts, phrases)[:5] == []